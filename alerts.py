@@ -0,0 +1,120 @@
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from notifications_service import broadcast_alert
+from config import ALERT_SEND_THREADS
+
+dispatcher = None
+dispatcher_lock = threading.Lock()
+
+
+class AlertDispatcher:
+    def __init__(self, current_status=None, send_threads=ALERT_SEND_THREADS):
+        self.current_status = current_status
+        self.pending = []
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.send_executor = ThreadPoolExecutor(max_workers=send_threads, thread_name_prefix="alert-send")
+        self.stats = {"queued": 0, "sent": 0, "suppressed": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self.thread.start()
+
+    def on_result(self, monitor, result):
+        previous = monitor.get("status", "pending")
+        if result["status"] == "down" and previous != "down":
+            return self.notify(monitor, "down", result.get("error") or "")
+        if result["status"] == "up" and previous == "down":
+            response_time = result.get("response_time")
+            return self.notify(monitor, "up", f"Response time: {response_time}ms" if response_time is not None else "")
+        return False
+
+    def notify(self, monitor, status, details=""):
+        settings = monitor.get("notification_settings") or {}
+        if not settings.get("enabled", True) or not settings.get(f"on_{status}", True):
+            self.stats["suppressed"] += 1
+            return False
+        delay = settings.get("delay") or 0
+        alert = {
+            "monitor_id": str(monitor["_id"]),
+            "monitor_name": monitor.get("name", "Unknown"),
+            "user_id": monitor.get("user_id"),
+            "status": status,
+            "details": details,
+            "delayed": delay > 0
+        }
+        with self.condition:
+            self.seq += 1
+            heapq.heappush(self.pending, (time.monotonic() + delay, self.seq, alert))
+            self.stats["queued"] += 1
+            self.condition.notify()
+        return True
+
+    def _next_due(self):
+        with self.condition:
+            while not self.stop_event.is_set():
+                if self.pending:
+                    wait = self.pending[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self.pending)[2]
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+        return None
+
+    def _run(self):
+        while True:
+            alert = self._next_due()
+            if alert is None:
+                return
+            if alert["delayed"] and self.current_status is not None:
+                if self.current_status(alert["monitor_id"]) != alert["status"]:
+                    self.stats["suppressed"] += 1
+                    continue
+            self.send_executor.submit(self._send, alert)
+
+    def _send(self, alert):
+        try:
+            results = broadcast_alert(alert["monitor_name"], alert["status"], alert["details"], user_id=alert["user_id"])
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Failed to send alert for {alert['monitor_name']}: {e}")
+            return
+        for entry in results:
+            if entry["result"].get("success"):
+                self.stats["sent"] += 1
+            else:
+                self.stats["failed"] += 1
+                print(f"Alert via {entry['notification']} failed: {entry['result'].get('error')}")
+
+    def status(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats["pending"] = len(self.pending)
+        return stats
+
+    def shutdown(self):
+        with self.condition:
+            self.stop_event.set()
+            dropped = len(self.pending)
+            self.condition.notify()
+        if dropped:
+            print(f"Alert dispatcher stopped with {dropped} delayed alerts pending")
+        self.send_executor.shutdown(wait=True)
+
+
+def get_alert_dispatcher(current_status=None):
+    global dispatcher
+    with dispatcher_lock:
+        if dispatcher is None:
+            dispatcher = AlertDispatcher(current_status=current_status)
+    return dispatcher
+
+
+def shutdown_alert_dispatcher():
+    global dispatcher
+    with dispatcher_lock:
+        if dispatcher is not None:
+            dispatcher.shutdown()
+            dispatcher = None
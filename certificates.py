@@ -0,0 +1,86 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import OpenSSL
+from config import CERT_CACHE_SIZE, CERT_OBSERVATION_MAX_AGE
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def parse_certificate(cert_bin):
+    x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_ASN1, cert_bin)
+    expiry_date = datetime.strptime(x509.get_notAfter().decode("utf-8"), "%Y%m%d%H%M%SZ")
+    issuer = dict(x509.get_issuer().get_components())
+    subject = dict(x509.get_subject().get_components())
+    return {
+        "expiry_date": expiry_date,
+        "issuer": {k.decode(): v.decode() for k, v in issuer.items()},
+        "subject": {k.decode(): v.decode() for k, v in subject.items()}
+    }
+
+
+class CertificateCache:
+    def __init__(self, max_size=CERT_CACHE_SIZE, max_age=CERT_OBSERVATION_MAX_AGE):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.parsed = OrderedDict()
+        self.observed = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "observations": 0, "reused": 0}
+
+    def details(self, cert_bin):
+        fingerprint = hashlib.sha256(cert_bin).hexdigest()
+        with self.lock:
+            info = self.parsed.get(fingerprint)
+            if info is not None:
+                self.parsed.move_to_end(fingerprint)
+                self.stats["hits"] += 1
+        if info is None:
+            info = parse_certificate(cert_bin)
+            with self.lock:
+                self.stats["misses"] += 1
+                self.parsed[fingerprint] = info
+                while len(self.parsed) > self.max_size:
+                    self.parsed.popitem(last=False)
+
+        return {
+            "fingerprint": fingerprint,
+            "expiry_date": info["expiry_date"].isoformat(),
+            "days_until_expiry": (info["expiry_date"] - datetime.utcnow()).days,
+            "issuer": info["issuer"],
+            "subject": info["subject"]
+        }
+
+    def observe(self, host, port, cert_bin):
+        with self.lock:
+            self.stats["observations"] += 1
+            self.observed[(host, port)] = (cert_bin, time.monotonic())
+            self.observed.move_to_end((host, port))
+            while len(self.observed) > self.max_size:
+                self.observed.popitem(last=False)
+
+    def recent(self, host, port):
+        with self.lock:
+            entry = self.observed.get((host, port))
+            if entry is None or time.monotonic() - entry[1] > self.max_age:
+                return None
+            self.stats["reused"] += 1
+            return entry[0]
+
+    def status(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["certificates"] = len(self.parsed)
+            stats["endpoints"] = len(self.observed)
+        return stats
+
+
+def get_certificate_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CertificateCache()
+    return _cache
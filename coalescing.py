@@ -0,0 +1,100 @@
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+from config import PROBE_COALESCE_WINDOW_SECONDS
+
+PROBE_FIELDS = (
+    "timeout",
+    "expected_status_codes",
+    "follow_redirects",
+    "connection_mode",
+    "keyword",
+    "keywords",
+    "keyword_type",
+    "keyword_regex",
+    "keyword_match",
+    "port",
+    "ping_count",
+    "ssl_check",
+    "ssl_expiry_threshold",
+    "domain_expiry_threshold",
+    "max_body_bytes"
+)
+
+_inflight = {}
+_recent = OrderedDict()
+stats = {"probes": 0, "shared": 0}
+
+
+def normalize_url(url):
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url.lower()
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def fingerprint(monitor):
+    headers = monitor.get("headers") or {}
+    request = {
+        "type": (monitor.get("type") or "http").lower(),
+        "url": normalize_url(monitor.get("url")),
+        "method": (monitor.get("http_method") or "GET").upper(),
+        "headers": sorted((str(k).lower(), str(v)) for k, v in headers.items()),
+        "body": monitor.get("body") or ""
+    }
+    for field in PROBE_FIELDS:
+        request[field] = monitor.get(field)
+    encoded = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _prune(now):
+    while _recent:
+        key, (expires, _) = next(iter(_recent.items()))
+        if expires > now:
+            break
+        del _recent[key]
+
+
+def _share(result):
+    shared = copy.deepcopy(result)
+    shared.setdefault("details", {})["coalesced"] = True
+    stats["shared"] += 1
+    return shared
+
+
+def _remember(key, task, window):
+    _inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    _recent.pop(key, None)
+    _recent[key] = (time.monotonic() + window, task.result())
+
+
+async def coalesce(key, factory, window=PROBE_COALESCE_WINDOW_SECONDS):
+    _prune(time.monotonic())
+    cached = _recent.get(key)
+    if cached is not None:
+        return _share(cached[1])
+    task = _inflight.get(key)
+    if task is not None:
+        return _share(await asyncio.shield(task))
+    task = asyncio.ensure_future(factory())
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _remember(key, done, window))
+    stats["probes"] += 1
+    return copy.deepcopy(await asyncio.shield(task))
+
+
+def status():
+    return {
+        "probes": stats["probes"],
+        "shared": stats["shared"],
+        "in_flight": len(_inflight),
+        "recent": len(_recent)
+    }
@@ -39,3 +39,93 @@ NOTIFICATION_TYPES = {
     "slack": "Slack",
     "telegram": "Telegram"
 }
+
+ENGINE_MAX_CONCURRENCY = int(os.environ.get("ENGINE_MAX_CONCURRENCY", 2000))
+ENGINE_RECORD_THREADS = 8
+EMBEDDED_SCHEDULER = os.environ.get("EMBEDDED_SCHEDULER", "").lower() in ("1", "true", "yes")
+ALERT_SEND_THREADS = 4
+WORKER_STATUS_SECONDS = 10
+WORKER_STATUS_STALE_SECONDS = 60
+ENGINE_PROCESSES = os.environ.get("ENGINE_PROCESSES", "0")
+ENGINE_PROCESSES = (os.cpu_count() or 1) if ENGINE_PROCESSES == "auto" else int(ENGINE_PROCESSES or 0)
+ENGINE_LIVENESS_SECONDS = 1.0
+SCHEDULER_TICK_SECONDS = 0.1
+
+PROBE_COALESCE_WINDOW_SECONDS = 2
+
+CONFIRM_RETRIES = 2
+CONFIRM_RETRY_SECONDS = 5
+
+ADAPTIVE_INTERVALS = os.environ.get("ADAPTIVE_INTERVALS", "1").lower() not in ("0", "false", "no")
+BACKOFF_AFTER_CHECKS = 3
+BACKOFF_MAX_SECONDS = 900
+FAST_CHECKS = 3
+FAST_INTERVAL_DIVISOR = 4
+FAST_MIN_INTERVAL_SECONDS = 15
+LATENCY_SPIKE_RATIO = 3.0
+LATENCY_EWMA_ALPHA = 0.2
+REGISTRY_POLL_SECONDS = 10
+REGISTRY_RECONCILE_SECONDS = 60
+RESULT_BATCH_SIZE = 500
+RESULT_FLUSH_SECONDS = 2.0
+RESULT_BUFFER_LIMIT = 20000
+RESULT_SUBMIT_TIMEOUT = 5.0
+MONITOR_STATE_PERSIST_SECONDS = 30
+UPTIME_WINDOW_HOURS = 24
+UPTIME_BUCKET_SECONDS = 900
+
+CONNECTION_MODES = {
+    "warm": "Warm (reuse connections)",
+    "cold": "Cold (new connection per check)"
+}
+
+POOL_MAX_HOSTS = 1000
+POOL_MAX_IDLE_PER_HOST = 4
+POOL_IDLE_TIMEOUT = 30
+KEYWORD_REGEX_OVERLAP = 4096
+
+HTTP_MAX_BODY_BYTES = 65536
+KEYWORD_MAX_BODY_BYTES = 10 * 1024 * 1024
+HTTP_DETAIL_HEADERS = [
+    "Content-Type",
+    "Content-Length",
+    "Server",
+    "Location",
+    "Cache-Control",
+    "Age",
+    "Via",
+    "X-Cache"
+]
+
+CERT_CACHE_SIZE = 4096
+CERT_OBSERVATION_MAX_AGE = 300
+
+WHOIS_TIMEOUT = 15
+WHOIS_MAX_REFERRALS = 2
+WHOIS_MAX_RESPONSE_BYTES = 1024 * 1024
+WHOIS_CACHE_MIN_TTL = 3600
+WHOIS_CACHE_MAX_TTL = 7 * 86400
+WHOIS_CACHE_UNPARSED_TTL = 6 * 3600
+
+DNS_TIMEOUT = 5
+DNS_CACHE_MAX_ENTRIES = 10000
+DNS_CACHE_MIN_TTL = 5
+DNS_CACHE_MAX_TTL = 3600
+DNS_NEGATIVE_TTL = 60
+DNS_FALLBACK_TTL = 60
+DNS_PREFETCH_RATIO = 0.1
+DNS_HOSTS_FILE = os.environ.get("DNS_HOSTS_FILE", "/etc/hosts")
+
+WORKER_SHARDING = os.environ.get("WORKER_SHARDING", "").lower() in ("1", "true", "yes")
+WORKER_ID = os.environ.get("WORKER_ID") or None
+WORKER_HEARTBEAT_SECONDS = 5
+WORKER_LEASE_SECONDS = 15
+WORKER_HANDOFF_SECONDS = 10
+WORKER_RING_REPLICAS = 64
+
+LEADER_ELECTION = os.environ.get("LEADER_ELECTION", "1").lower() not in ("0", "false", "no")
+LEADER_LEASE_SECONDS = 15
+LEADER_RENEW_SECONDS = 5
+
+PING_INTERVAL = 0.2
+PORT_CONNECT_STAGGER = 0.25
@@ -0,0 +1,59 @@
+import threading
+from config import CONFIRM_RETRIES, CONFIRM_RETRY_SECONDS
+
+tracker = None
+tracker_lock = threading.Lock()
+
+
+def confirm_retries(monitor):
+    return max(0, int(monitor.get("confirm_retries", CONFIRM_RETRIES)))
+
+
+def retry_delay(monitor):
+    return min(CONFIRM_RETRY_SECONDS, monitor.get("interval", 300) / 2)
+
+
+class ConfirmationTracker:
+    def __init__(self):
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.stats = {"held": 0, "confirmed": 0, "recovered": 0}
+
+    def hold(self, monitor, result):
+        monitor_id = str(monitor["_id"])
+        with self.lock:
+            if result["status"] != "down" or monitor.get("status") == "down":
+                if self.failures.pop(monitor_id, None) is not None and result["status"] == "up":
+                    self.stats["recovered"] += 1
+                return None
+            failures = self.failures.get(monitor_id, 0)
+            if failures >= confirm_retries(monitor):
+                self.failures.pop(monitor_id, None)
+                if failures:
+                    self.stats["confirmed"] += 1
+                return None
+            self.failures[monitor_id] = failures + 1
+            self.stats["held"] += 1
+            return failures + 1
+
+    def forget(self, monitor_id):
+        with self.lock:
+            self.failures.pop(str(monitor_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.failures.clear()
+
+    def status(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["confirming"] = len(self.failures)
+        return stats
+
+
+def get_confirmation_tracker():
+    global tracker
+    with tracker_lock:
+        if tracker is None:
+            tracker = ConfirmationTracker()
+    return tracker
@@ -1,15 +1,18 @@
+import threading
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+from pymongo.errors import ConnectionFailure, OperationFailure
 from config import MONGODB_URI, DATABASE_NAME
 import streamlit as st
 
-@st.cache_resource
-def get_database():
+_database = None
+_database_lock = threading.Lock()
+
+def connect_database():
     if not MONGODB_URI:
-        return None
-        
+        raise ConnectionFailure("MONGODB_URI is not set")
+    
+    client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
     try:
-        client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
         client.admin.command('ping')
         db = client[DATABASE_NAME]
         
@@ -25,16 +28,61 @@ def get_database():
             db.create_collection("status_pages")
         if "settings" not in db.list_collection_names():
             db.create_collection("settings")
+        if "check_rollups" not in db.list_collection_names():
+            db.create_collection("check_rollups")
+        if "domain_whois" not in db.list_collection_names():
+            db.create_collection("domain_whois")
+        if "workers" not in db.list_collection_names():
+            db.create_collection("workers")
+        if "leases" not in db.list_collection_names():
+            db.create_collection("leases")
             
+        db.monitors.create_index("updated_at")
         db.check_results.create_index([("monitor_id", 1), ("timestamp", -1)])
         db.incidents.create_index([("monitor_id", 1), ("created_at", -1)])
+        db.incidents.create_index([("monitor_id", 1), ("status", 1)])
+        try:
+            db.incidents.create_index(
+                "monitor_id",
+                name="monitor_id_ongoing",
+                unique=True,
+                partialFilterExpression={"status": "ongoing"}
+            )
+        except OperationFailure as e:
+            print(f"Could not create unique ongoing-incident index (resolve duplicate ongoing incidents first): {e}")
+        db.check_rollups.create_index([("monitor_id", 1), ("granularity", 1), ("bucket", -1)], unique=True)
+        db.check_rollups.create_index("expires_at", expireAfterSeconds=0)
+        db.workers.create_index("expires_at", expireAfterSeconds=300)
+        db.workers.create_index("status_at", expireAfterSeconds=3600)
         
         return db
+    except Exception:
+        client.close()
+        raise
+
+def open_database():
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = connect_database()
+        return _database
+
+def report_database_error(message):
+    print(message)
+    if st.runtime.exists():
+        st.error(message)
+
+def get_database():
+    if not MONGODB_URI:
+        return None
+    
+    try:
+        return open_database()
     except ConnectionFailure as e:
-        st.error(f"Failed to connect to MongoDB: {e}")
+        report_database_error(f"Failed to connect to MongoDB: {e}")
         return None
     except Exception as e:
-        st.error(f"Database error: {e}")
+        report_database_error(f"Database error: {e}")
         return None
 
 def get_monitors_collection():
@@ -45,6 +93,22 @@ def get_check_results_collection():
     db = get_database()
     return db.check_results if db is not None else None
 
+def get_check_rollups_collection():
+    db = get_database()
+    return db.check_rollups if db is not None else None
+
+def get_domain_whois_collection():
+    db = get_database()
+    return db.domain_whois if db is not None else None
+
+def get_workers_collection():
+    db = get_database()
+    return db.workers if db is not None else None
+
+def get_leases_collection():
+    db = get_database()
+    return db.leases if db is not None else None
+
 def get_incidents_collection():
     db = get_database()
     return db.incidents if db is not None else None
@@ -0,0 +1,232 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from collections import OrderedDict
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from config import (
+    DNS_TIMEOUT,
+    DNS_CACHE_MAX_ENTRIES,
+    DNS_CACHE_MIN_TTL,
+    DNS_CACHE_MAX_TTL,
+    DNS_NEGATIVE_TTL,
+    DNS_FALLBACK_TTL,
+    DNS_PREFETCH_RATIO,
+    DNS_HOSTS_FILE
+)
+
+RECORD_TYPES = {socket.AF_INET: "A", socket.AF_INET6: "AAAA"}
+
+_cache = None
+
+
+class DNSEntry:
+    __slots__ = ("addresses", "error", "ttl", "expires", "hits", "refreshing")
+
+    def __init__(self, addresses, ttl, error=None):
+        self.addresses = addresses
+        self.error = error
+        self.ttl = ttl
+        self.expires = time.monotonic() + ttl
+        self.hits = 0
+        self.refreshing = False
+
+
+class HostsFile:
+    def __init__(self, path=DNS_HOSTS_FILE):
+        self.path = path
+        self.mtime = None
+        self.names = {}
+
+    def _load(self):
+        names = {}
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) < 2:
+                    continue
+                try:
+                    address = ipaddress.ip_address(fields[0].split("%", 1)[0])
+                except ValueError:
+                    continue
+                family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+                for name in fields[1:]:
+                    addresses = names.setdefault(name.rstrip(".").lower(), [])
+                    if (family, fields[0]) not in addresses:
+                        addresses.append((family, fields[0]))
+        self.names = names
+
+    def lookup(self, host):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime != self.mtime:
+            try:
+                self._load()
+            except OSError:
+                return None
+            self.mtime = mtime
+        return self.names.get(host)
+
+
+class DNSCache:
+    def __init__(self, resolver=None, max_entries=DNS_CACHE_MAX_ENTRIES, hosts=None):
+        self.resolver = resolver
+        self.max_entries = max_entries
+        self.hosts = hosts if hosts is not None else HostsFile()
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "negative_hits": 0, "prefetches": 0, "fallbacks": 0, "hosts_file": 0, "evicted": 0
+        }
+
+    def _resolver(self):
+        if self.resolver is None:
+            try:
+                self.resolver = dns.asyncresolver.Resolver()
+            except dns.resolver.NoResolverConfiguration:
+                self.resolver = False
+            else:
+                self.resolver.lifetime = DNS_TIMEOUT
+                self.resolver.cache = None
+        return self.resolver
+
+    async def _query(self, host, family):
+        resolver = self._resolver()
+        if not resolver:
+            return None
+        try:
+            answer = await resolver.resolve(host, RECORD_TYPES[family], raise_on_no_answer=False)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.Timeout):
+            return None
+        if answer.rrset is None:
+            return [], None
+        return [(family, record.address) for record in answer.rrset], answer.rrset.ttl
+
+    async def _fallback(self, host):
+        self.stats["fallbacks"] += 1
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return DNSEntry([], DNS_NEGATIVE_TTL, error=str(e))
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            if (family, sockaddr[0]) not in addresses:
+                addresses.append((family, sockaddr[0]))
+        return DNSEntry(addresses, DNS_FALLBACK_TTL)
+
+    async def _lookup(self, host):
+        addresses = self.hosts.lookup(host)
+        if addresses:
+            self.stats["hosts_file"] += 1
+            return DNSEntry(addresses, DNS_FALLBACK_TTL)
+        if "." not in host:
+            return await self._fallback(host)
+
+        answers = await asyncio.gather(*(self._query(host, family) for family in RECORD_TYPES))
+        addresses = []
+        ttls = []
+        for answer in answers:
+            if answer is None:
+                continue
+            records, ttl = answer
+            addresses.extend(records)
+            if ttl is not None:
+                ttls.append(ttl)
+
+        if not addresses:
+            return await self._fallback(host)
+        ttl = min(max(min(ttls), DNS_CACHE_MIN_TTL), DNS_CACHE_MAX_TTL)
+        return DNSEntry(addresses, ttl)
+
+    def _store(self, host, entry):
+        self.entries[host] = entry
+        self.entries.move_to_end(host)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def _start(self, host):
+        task = self.inflight.get(host)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(host))
+            self.inflight[host] = task
+            task.add_done_callback(lambda done: self._finish(host, done))
+        return task
+
+    def _finish(self, host, task):
+        self.inflight.pop(host, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(host, task.result())
+
+    def _prefetch(self, host, entry):
+        if entry.refreshing or entry.error or entry.hits < 2:
+            return
+        if entry.expires - time.monotonic() > entry.ttl * DNS_PREFETCH_RATIO:
+            return
+        entry.refreshing = True
+        self.stats["prefetches"] += 1
+        self._start(host)
+
+    async def resolve(self, host):
+        host = host.strip("[]").rstrip(".").lower()
+        try:
+            address = ipaddress.ip_address(host)
+            return [(socket.AF_INET6 if address.version == 6 else socket.AF_INET, host)]
+        except ValueError:
+            pass
+
+        entry = self.entries.get(host)
+        if entry is not None and entry.expires > time.monotonic():
+            entry.hits += 1
+            self.entries.move_to_end(host)
+            if entry.error:
+                self.stats["negative_hits"] += 1
+            else:
+                self.stats["hits"] += 1
+                self._prefetch(host, entry)
+        else:
+            self.stats["misses"] += 1
+            entry = await asyncio.shield(self._start(host))
+
+        if entry.error:
+            raise socket.gaierror(socket.EAI_NONAME, f"Could not resolve {host}: {entry.error}")
+        if not entry.addresses:
+            raise socket.gaierror(socket.EAI_NODATA, f"No addresses for {host}")
+        return entry.addresses
+
+    def status(self):
+        stats = dict(self.stats)
+        stats["entries"] = len(self.entries)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / lookups * 100, 2) if lookups else None
+        return stats
+
+
+def get_dns_cache():
+    global _cache
+    if _cache is None:
+        _cache = DNSCache()
+    return _cache
+
+
+async def resolve(host):
+    return await get_dns_cache().resolve(host)
+
+
+async def connect_addresses(addresses, port, **kwargs):
+    error = None
+    for _, address in addresses:
+        try:
+            return await asyncio.open_connection(address, port, **kwargs)
+        except OSError as e:
+            error = e
+    raise error
+
+
+async def open_connection(host, port, **kwargs):
+    return await connect_addresses(await resolve(host), port, **kwargs)
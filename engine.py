@@ -0,0 +1,269 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from config import ENGINE_MAX_CONCURRENCY, ENGINE_RECORD_THREADS, ENGINE_LIVENESS_SECONDS
+
+loop_thread = None
+loop_thread_lock = threading.Lock()
+
+
+class EventLoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="check-engine-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+def get_loop_thread():
+    global loop_thread
+    with loop_thread_lock:
+        if loop_thread is None:
+            loop_thread = EventLoopThread()
+    return loop_thread
+
+
+def run_sync(coro, timeout=None):
+    return get_loop_thread().submit(coro).result(timeout)
+
+
+class CheckEngine:
+    def __init__(self, probe, on_result, max_concurrency=ENGINE_MAX_CONCURRENCY, record_threads=ENGINE_RECORD_THREADS):
+        self.probe = probe
+        self.on_result = on_result
+        self.max_concurrency = max_concurrency
+        self.loop_thread = get_loop_thread()
+        self.record_executor = ThreadPoolExecutor(max_workers=record_threads, thread_name_prefix="check-record")
+        self.semaphore = None
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "total_probe_ms": 0.0
+        }
+
+    def _claim(self, monitor_id):
+        with self.lock:
+            if monitor_id in self.in_flight:
+                self.stats["skipped"] += 1
+                return False
+            self.in_flight.add(monitor_id)
+            self.stats["submitted"] += 1
+        return True
+
+    def submit(self, monitor):
+        monitor_id = str(monitor["_id"])
+        if not self._claim(monitor_id):
+            return False
+        self.loop_thread.submit(self._run(monitor_id, monitor))
+        return True
+
+    async def _run(self, monitor_id, monitor):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.semaphore:
+                start = time.monotonic()
+                result = await self.probe(monitor)
+                elapsed = (time.monotonic() - start) * 1000
+            await loop.run_in_executor(self.record_executor, self.on_result, monitor, result)
+            with self.lock:
+                self.stats["completed"] += 1
+                self.stats["total_probe_ms"] += elapsed
+        except Exception as e:
+            with self.lock:
+                self.stats["failed"] += 1
+            print(f"Error checking monitor {monitor_id}: {e}")
+        finally:
+            with self.lock:
+                self.in_flight.discard(monitor_id)
+
+    def status(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self.in_flight)
+        total_probe_ms = stats.pop("total_probe_ms")
+        stats["avg_probe_ms"] = round(total_probe_ms / stats["completed"], 2) if stats["completed"] else None
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+    def shutdown(self, wait=False):
+        self.record_executor.shutdown(wait=wait)
+
+
+def child_main(probe, tasks, results, max_concurrency):
+    asyncio.run(child_loop(probe, tasks, results, max_concurrency))
+
+
+async def child_loop(probe, tasks, results, max_concurrency):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="check-tasks")
+    running = set()
+    while True:
+        monitor = await loop.run_in_executor(reader, tasks.get)
+        if monitor is None:
+            break
+        task = asyncio.ensure_future(child_probe(probe, monitor, semaphore, results))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    reader.shutdown(wait=False)
+
+
+async def child_probe(probe, monitor, semaphore, results):
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            result, error = await probe(monitor), None
+        except Exception as e:
+            result, error = None, str(e)
+        elapsed = (time.monotonic() - start) * 1000
+    results.put((str(monitor["_id"]), result, error, elapsed))
+
+
+class ProcessEngine:
+    def __init__(self, probe, on_result, processes=None, max_concurrency=ENGINE_MAX_CONCURRENCY, record_threads=ENGINE_RECORD_THREADS, affinity=None):
+        self.probe = probe
+        self.on_result = on_result
+        self.affinity = affinity
+        self.processes = processes or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency
+        self.per_process = max(1, max_concurrency // self.processes)
+        self.context = multiprocessing.get_context("spawn")
+        self.results = self.context.Queue()
+        self.record_executor = ThreadPoolExecutor(max_workers=record_threads, thread_name_prefix="check-record")
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "restarts": 0,
+            "total_probe_ms": 0.0
+        }
+        self.workers = [self._spawn(index) for index in range(self.processes)]
+        self.collector = threading.Thread(target=self._collect, name="check-collector", daemon=True)
+        self.collector.start()
+
+    def _spawn(self, index):
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=child_main,
+            args=(self.probe, tasks, self.results, self.per_process),
+            name=f"check-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return process, tasks
+
+    def submit(self, monitor):
+        monitor_id = str(monitor["_id"])
+        affinity_key = self.affinity(monitor) if self.affinity else monitor_id
+        index = zlib.crc32(affinity_key.encode("utf-8")) % self.processes
+        with self.lock:
+            if monitor_id in self.in_flight:
+                self.stats["skipped"] += 1
+                return False
+            self.in_flight[monitor_id] = (monitor, index)
+            self.stats["submitted"] += 1
+            tasks = self.workers[index][1]
+        tasks.put(monitor)
+        return True
+
+    def _collect(self):
+        next_liveness = time.monotonic() + ENGINE_LIVENESS_SECONDS
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_liveness:
+                self._check_workers()
+                next_liveness = now + ENGINE_LIVENESS_SECONDS
+            try:
+                monitor_id, result, error, elapsed = self.results.get(timeout=max(0.0, next_liveness - now))
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            with self.lock:
+                entry = self.in_flight.get(monitor_id)
+            if entry is None:
+                continue
+            if error is not None:
+                print(f"Error checking monitor {monitor_id}: {error}")
+                self._release(monitor_id, "failed")
+                continue
+            self.record_executor.submit(self._record, monitor_id, entry[0], result, elapsed)
+
+    def _record(self, monitor_id, monitor, result, elapsed):
+        try:
+            self.on_result(monitor, result)
+        except Exception as e:
+            print(f"Error recording monitor {monitor_id}: {e}")
+            self._release(monitor_id, "failed")
+            return
+        self._release(monitor_id, "completed", elapsed)
+
+    def _release(self, monitor_id, outcome, elapsed=0.0):
+        with self.lock:
+            self.in_flight.pop(monitor_id, None)
+            self.stats[outcome] += 1
+            self.stats["total_probe_ms"] += elapsed
+
+    def _check_workers(self):
+        for index, (process, _) in enumerate(self.workers):
+            if process.is_alive() or self.stop_event.is_set():
+                continue
+            print(f"Check worker {index} exited with code {process.exitcode}, restarting")
+            with self.lock:
+                self.workers[index] = self._spawn(index)
+                lost = [monitor_id for monitor_id, (_, owner) in self.in_flight.items() if owner == index]
+                for monitor_id in lost:
+                    del self.in_flight[monitor_id]
+                self.stats["failed"] += len(lost)
+                self.stats["restarts"] += 1
+
+    def status(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self.in_flight)
+            stats["alive"] = sum(1 for process, _ in self.workers if process.is_alive())
+        total_probe_ms = stats.pop("total_probe_ms")
+        stats["avg_probe_ms"] = round(total_probe_ms / stats["completed"], 2) if stats["completed"] else None
+        stats["max_concurrency"] = self.max_concurrency
+        stats["processes"] = self.processes
+        return stats
+
+    def shutdown(self, wait=False):
+        self.stop_event.set()
+        for process, tasks in self.workers:
+            tasks.put(None)
+        for process, _ in self.workers:
+            process.join(timeout=5 if wait else 1)
+            if process.is_alive():
+                process.terminate()
+        self.record_executor.shutdown(wait=wait)
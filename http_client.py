@@ -0,0 +1,506 @@
+import asyncio
+import base64
+import ssl
+import time
+from collections import OrderedDict, deque
+from email.message import Message
+from http.cookiejar import CookieJar
+import certifi
+from urllib.parse import urlsplit, urljoin, unquote, quote
+from urllib.request import Request, getproxies_environment, proxy_bypass_environment
+from config import POOL_MAX_HOSTS, POOL_MAX_IDLE_PER_HOST, POOL_IDLE_TIMEOUT
+import dns_cache
+
+MAX_REDIRECTS = 10
+USER_AGENT = "UptimeMonitor/1.0"
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+REDIRECT_DRAIN_BYTES = 65536
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+TARGET_SAFE = "/%?=&:@!$'()*+,;~"
+
+_ssl_context = None
+_pool = None
+_proxies = None
+
+
+class HTTPProtocolError(Exception):
+    pass
+
+
+class HTTPResponse:
+    def __init__(self, status_code, reason, headers, url, http_version="HTTP/1.1"):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.set_cookies = []
+        self.url = url
+        self.http_version = http_version
+        self.content = b""
+        self.bytes_read = 0
+        self.complete = True
+        self.reused = False
+        self.peer_cert = None
+        self.timings = None
+
+    def keep_alive(self):
+        connection = self.header("Connection", "").lower()
+        if self.http_version == "HTTP/1.0":
+            return "keep-alive" in connection
+        return "close" not in connection
+
+    def info(self):
+        message = Message()
+        for cookie in self.set_cookies:
+            message["Set-Cookie"] = cookie
+        return message
+
+    def header(self, name, default=None):
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return default
+
+
+class Connection:
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = time.monotonic()
+        self.reusable = False
+        ssl_object = writer.get_extra_info("ssl_object")
+        self.peer_cert = ssl_object.getpeercert(binary_form=True) if ssl_object else None
+
+    def usable(self, idle_timeout):
+        return (
+            not self.writer.is_closing()
+            and not self.reader.at_eof()
+            and time.monotonic() - self.idle_since < idle_timeout
+        )
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    def __init__(self, max_hosts=POOL_MAX_HOSTS, max_idle_per_host=POOL_MAX_IDLE_PER_HOST, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.max_hosts = max_hosts
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.hosts = OrderedDict()
+        self.idle_count = 0
+        self.last_sweep = time.monotonic()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def acquire(self, key):
+        self._maybe_sweep()
+        idle = self.hosts.get(key)
+        while idle:
+            conn = idle.pop()
+            self.idle_count -= 1
+            if conn.usable(self.idle_timeout):
+                self.hosts.move_to_end(key)
+                self.stats["hits"] += 1
+                return conn
+            conn.close()
+            self.stats["evicted"] += 1
+        self.stats["misses"] += 1
+        return None
+
+    def release(self, conn):
+        if not conn.reusable or conn.writer.is_closing():
+            conn.close()
+            return
+        conn.reusable = False
+        conn.idle_since = time.monotonic()
+        idle = self.hosts.get(conn.key)
+        if idle is None:
+            idle = self.hosts[conn.key] = deque()
+        self.hosts.move_to_end(conn.key)
+        idle.append(conn)
+        self.idle_count += 1
+        while len(idle) > self.max_idle_per_host:
+            idle.popleft().close()
+            self.idle_count -= 1
+            self.stats["evicted"] += 1
+        while len(self.hosts) > self.max_hosts:
+            _, evicted = self.hosts.popitem(last=False)
+            self.idle_count -= len(evicted)
+            for old in evicted:
+                old.close()
+                self.stats["evicted"] += 1
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self.last_sweep < self.idle_timeout:
+            return
+        self.last_sweep = now
+        for key in list(self.hosts):
+            idle = self.hosts[key]
+            fresh = deque(conn for conn in idle if conn.usable(self.idle_timeout))
+            self.stats["evicted"] += len(idle) - len(fresh)
+            self.idle_count -= len(idle) - len(fresh)
+            for conn in idle:
+                if conn not in fresh:
+                    conn.close()
+            if fresh:
+                self.hosts[key] = fresh
+            else:
+                del self.hosts[key]
+
+    def status(self):
+        stats = dict(self.stats)
+        stats["hosts"] = len(self.hosts)
+        stats["idle_connections"] = self.idle_count
+        return stats
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool()
+    return _pool
+
+
+def get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context(cafile=certifi.where())
+    return _ssl_context
+
+
+def split_url(url):
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "http").lower()
+    if scheme not in ("http", "https"):
+        raise HTTPProtocolError(f"Unsupported URL scheme: {scheme}")
+    if not parts.hostname:
+        raise HTTPProtocolError(f"Invalid URL: {url}")
+    host = parts.hostname
+    if not host.isascii():
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            raise HTTPProtocolError(f"Invalid host name: {parts.hostname}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return scheme, host, port, quote(target, safe=TARGET_SAFE)
+
+
+def rebuild_method(status_code, method):
+    if status_code in (302, 303) and method != "HEAD":
+        return "GET"
+    if status_code == 301 and method == "POST":
+        return "GET"
+    return method
+
+
+def basic_auth(url):
+    parts = urlsplit(url)
+    if parts.username is None:
+        return None
+    credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+    return "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+
+
+def get_proxy(scheme, host):
+    global _proxies
+    if _proxies is None:
+        _proxies = getproxies_environment()
+    proxy = _proxies.get(scheme)
+    if not proxy or proxy_bypass_environment(host, _proxies):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    parts = urlsplit(proxy)
+    if parts.scheme != "http" or not parts.hostname:
+        return None
+    return parts.hostname, parts.port or 80, basic_auth(proxy)
+
+
+def new_timings():
+    return {phase: 0.0 for phase in PHASES}
+
+
+def lap(timings, phase, started):
+    now = time.perf_counter()
+    if timings is not None:
+        timings[phase] += (now - started) * 1000
+    return now
+
+
+async def open_tunnel(reader, writer, host, port, proxy_auth):
+    authority = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+    lines = [f"CONNECT {authority} HTTP/1.1", f"Host: {authority}", f"User-Agent: {USER_AGENT}"]
+    if proxy_auth:
+        lines.append(f"Proxy-Authorization: {proxy_auth}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    response = await read_response_head(reader, f"https://{authority}/")
+    if response.status_code != 200:
+        raise HTTPProtocolError(f"Proxy CONNECT failed: {response.status_code} {response.reason}")
+
+
+async def open_connection(scheme, host, port, verify=True, timings=None, proxy=None):
+    started = time.perf_counter()
+    addresses = await dns_cache.resolve(proxy[0] if proxy else host)
+    started = lap(timings, "dns", started)
+    reader, writer = await dns_cache.connect_addresses(addresses, proxy[1] if proxy else port)
+    started = lap(timings, "connect", started)
+    if proxy and scheme == "https":
+        try:
+            await open_tunnel(reader, writer, host, port, proxy[2])
+        except BaseException:
+            writer.close()
+            raise
+        started = lap(timings, "connect", started)
+    if scheme == "https":
+        context = get_ssl_context()
+        if not verify:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        try:
+            await writer.start_tls(context, server_hostname=host)
+        except BaseException:
+            writer.close()
+            raise
+        lap(timings, "tls", started)
+    return reader, writer
+
+
+def build_request(method, host, port, scheme, target, headers, body, keep_alive=False, absolute=False):
+    default_port = 443 if scheme == "https" else 80
+    host_header = host if port == default_port else f"{host}:{port}"
+    if ":" in host and not host.startswith("["):
+        host_header = f"[{host}]" if port == default_port else f"[{host}]:{port}"
+    if absolute:
+        target = f"{scheme}://{host_header}{target}"
+
+    request_headers = {
+        "Host": host_header,
+        "User-Agent": USER_AGENT,
+        "Accept": "*/*",
+        "Accept-Encoding": "identity",
+        "Connection": "keep-alive" if keep_alive else "close"
+    }
+    for key, value in (headers or {}).items():
+        for existing in list(request_headers):
+            if existing.lower() == str(key).lower():
+                del request_headers[existing]
+        request_headers[str(key)] = str(value)
+
+    if body:
+        request_headers["Content-Length"] = str(len(body))
+
+    lines = [f"{method} {target} HTTP/1.1"]
+    lines.extend(f"{key}: {value}" for key, value in request_headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+
+async def read_response_head(reader, url):
+    status_line = await reader.readline()
+    if not status_line:
+        raise HTTPProtocolError("Server closed connection without a response")
+
+    parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise HTTPProtocolError(f"Malformed status line: {status_line[:100]!r}")
+
+    headers = {}
+    set_cookies = []
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        key = key.strip()
+        value = value.strip()
+        if key.lower() == "set-cookie":
+            set_cookies.append(value)
+        if key in headers:
+            headers[key] = f"{headers[key]}, {value}"
+        else:
+            headers[key] = value
+
+    response = HTTPResponse(int(parts[1]), parts[2] if len(parts) > 2 else "", headers, url, parts[0])
+    response.set_cookies = set_cookies
+    return response
+
+
+def has_body(method, status_code):
+    return method != "HEAD" and status_code not in (204, 304) and not 100 <= status_code < 200
+
+
+def has_framing(method, response):
+    if not has_body(method, response.status_code):
+        return True
+    if "chunked" in response.header("Transfer-Encoding", "").lower():
+        return True
+    return (response.header("Content-Length") or "").isdigit()
+
+
+async def iter_body(reader, response, method):
+    if not has_body(method, response.status_code):
+        return
+
+    if "chunked" in response.header("Transfer-Encoding", "").lower():
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                raise HTTPProtocolError("Connection closed inside chunked body")
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readline()
+
+    content_length = response.header("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        remaining = int(content_length)
+        while remaining > 0:
+            chunk = await reader.read(min(65536, remaining))
+            if not chunk:
+                raise HTTPProtocolError("Connection closed before full body was received")
+            remaining -= len(chunk)
+            yield chunk
+        return
+
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            return
+        yield chunk
+
+
+def declared_length(response):
+    value = response.header("Content-Length")
+    return int(value) if value and value.isdigit() else None
+
+
+def discard(chunk):
+    return False
+
+
+async def read_body(conn, response, method, consumer=None, body_limit=None, timings=None):
+    started = time.perf_counter()
+    length = declared_length(response)
+    if consumer is discard and body_limit is not None and length is not None and length > body_limit:
+        response.complete = False
+        return
+
+    chunks = []
+    async for chunk in iter_body(conn.reader, response, method):
+        if body_limit is not None and response.bytes_read + len(chunk) > body_limit:
+            chunk = chunk[:body_limit - response.bytes_read]
+            response.complete = False
+        response.bytes_read += len(chunk)
+        if consumer is None:
+            chunks.append(chunk)
+        elif consumer(chunk):
+            response.complete = False
+        if not response.complete:
+            break
+    response.content = b"".join(chunks)
+    lap(timings, "transfer", started)
+
+
+def can_reuse(pool, method, response):
+    return (
+        pool is not None
+        and response.complete
+        and has_framing(method, response)
+        and response.keep_alive()
+    )
+
+
+async def send_request(conn, method, host, port, scheme, target, headers, body, url, keep_alive, timings=None, absolute=False):
+    started = time.perf_counter()
+    conn.writer.write(build_request(method, host, port, scheme, target, headers, body, keep_alive=keep_alive, absolute=absolute))
+    await conn.writer.drain()
+    response = await read_response_head(conn.reader, url)
+    lap(timings, "ttfb", started)
+    return response
+
+
+async def fetch(method, url, headers=None, body=None, follow_redirects=True, verify=True, pool=None, consumer=None, body_limit=None):
+    method = method.upper()
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    timings = new_timings()
+    auth = None
+    auth_host = None
+    cookies = CookieJar()
+
+    for _ in range(MAX_REDIRECTS + 1):
+        scheme, host, port, target = split_url(url)
+        credentials = basic_auth(url)
+        if credentials:
+            auth, auth_host = credentials, host
+        elif host != auth_host:
+            auth = None
+        proxy = get_proxy(scheme, host)
+        absolute = proxy is not None and scheme == "http"
+        authority = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+        cookie_request = Request(f"{scheme}://{authority}{target}")
+        cookies.add_cookie_header(cookie_request)
+        cookie_header = cookie_request.get_header("Cookie")
+        request_headers = headers
+        if auth or cookie_header or (absolute and proxy[2]):
+            request_headers = {}
+            if auth:
+                request_headers["Authorization"] = auth
+            if cookie_header:
+                request_headers["Cookie"] = cookie_header
+            if absolute and proxy[2]:
+                request_headers["Proxy-Authorization"] = proxy[2]
+            request_headers.update(headers or {})
+        key = (scheme, host, port, verify, proxy)
+        conn = pool.acquire(key) if pool is not None else None
+        reused = conn is not None
+        try:
+            if conn is not None:
+                try:
+                    response = await send_request(conn, method, host, port, scheme, target, request_headers, body, url, True, timings, absolute)
+                except (HTTPProtocolError, ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    conn = None
+                    reused = False
+            if conn is None:
+                reader, writer = await open_connection(scheme, host, port, verify=verify, timings=timings, proxy=proxy)
+                conn = Connection(key, reader, writer)
+                response = await send_request(conn, method, host, port, scheme, target, request_headers, body, url, pool is not None, timings, absolute)
+            response.reused = reused
+            response.peer_cert = conn.peer_cert
+            if response.set_cookies:
+                cookies.extract_cookies(response, cookie_request)
+
+            location = response.header("Location")
+            if follow_redirects and response.status_code in REDIRECT_CODES and location:
+                if pool is not None:
+                    await read_body(conn, response, method, consumer=discard, body_limit=REDIRECT_DRAIN_BYTES, timings=timings)
+                    conn.reusable = can_reuse(pool, method, response)
+                url = urljoin(url, location)
+                redirected_method = rebuild_method(response.status_code, method)
+                if redirected_method != method:
+                    method = redirected_method
+                    body = None
+                continue
+
+            await read_body(conn, response, method, consumer=consumer, body_limit=body_limit, timings=timings)
+            conn.reusable = can_reuse(pool, method, response)
+            response.timings = timings
+            return response
+        finally:
+            if conn is not None:
+                if pool is not None:
+                    pool.release(conn)
+                else:
+                    conn.close()
+
+    raise HTTPProtocolError(f"Exceeded {MAX_REDIRECTS} redirects")
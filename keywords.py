@@ -0,0 +1,65 @@
+import codecs
+import re
+from functools import lru_cache
+from config import KEYWORD_REGEX_OVERLAP
+
+
+def get_keywords(monitor):
+    keywords = monitor.get("keywords") or []
+    if not keywords and monitor.get("keyword"):
+        keywords = [monitor["keyword"]]
+    return [k for k in keywords if k]
+
+
+@lru_cache(maxsize=4096)
+def compile_keywords(keywords, regex):
+    patterns = tuple(
+        re.compile(keyword if regex else re.escape(keyword), re.IGNORECASE)
+        for keyword in keywords
+    )
+    if regex:
+        overlap = KEYWORD_REGEX_OVERLAP
+    else:
+        overlap = max(len(keyword) for keyword in keywords) - 1
+    return patterns, overlap
+
+
+def invalid_patterns(keywords):
+    errors = []
+    for keyword in keywords:
+        try:
+            re.compile(keyword)
+        except re.error as e:
+            errors.append(f"{keyword}: {e}")
+    return errors
+
+
+class KeywordScanner:
+    def __init__(self, keywords, regex=False, match="any"):
+        self.keywords = tuple(keywords)
+        self.patterns, self.overlap = compile_keywords(self.keywords, regex)
+        self.match = match
+        self.found = set()
+        self.tail = ""
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.bytes_scanned = 0
+
+    def done(self):
+        if self.match == "all":
+            return len(self.found) == len(self.patterns)
+        return bool(self.found)
+
+    def feed(self, chunk, final=False):
+        self.bytes_scanned += len(chunk)
+        text = self.tail + self.decoder.decode(chunk, final)
+        for index, pattern in enumerate(self.patterns):
+            if index not in self.found and pattern.search(text):
+                self.found.add(index)
+        self.tail = text[-self.overlap:] if self.overlap > 0 else ""
+        return self.done()
+
+    def finish(self):
+        return self.done() or self.feed(b"", final=True)
+
+    def found_keywords(self):
+        return [self.keywords[index] for index in sorted(self.found)]
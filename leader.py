@@ -0,0 +1,138 @@
+import threading
+import time
+from models import Lease
+from config import LEADER_LEASE_SECONDS, LEADER_RENEW_SECONDS
+
+election = None
+election_lock = threading.Lock()
+
+
+class LeaderElection:
+    def __init__(self, name, holder_id, lease_seconds=LEADER_LEASE_SECONDS, renew_seconds=LEADER_RENEW_SECONDS):
+        self.name = name
+        self.holder_id = holder_id
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = min(renew_seconds, lease_seconds / 3)
+        self.token = None
+        self.deadline = 0.0
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {"acquired": 0, "lost": 0, "fenced": 0}
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, leader):
+        for listener in self.listeners:
+            try:
+                listener(leader)
+            except Exception as e:
+                print(f"Leadership listener failed: {e}")
+
+    def is_leader(self):
+        with self.lock:
+            return self.token is not None and time.monotonic() < self.deadline
+
+    def fence(self):
+        with self.lock:
+            token = self.token
+        if token is None or not self.is_leader():
+            self.stats["fenced"] += 1
+            return False
+        lease = Lease.get(self.name)
+        if lease is None or lease.get("holder") != self.holder_id or lease.get("token") != token:
+            self.stats["fenced"] += 1
+            return False
+        return True
+
+    def _step_down(self):
+        with self.lock:
+            if self.token is None:
+                return
+            self.token = None
+            self.deadline = 0.0
+        self.stats["lost"] += 1
+        print(f"{self.holder_id} lost {self.name} leadership")
+        self._notify(False)
+
+    def tick(self):
+        started = time.monotonic()
+        with self.lock:
+            token = self.token
+        if token is not None:
+            if Lease.renew(self.name, self.holder_id, token, self.lease_seconds):
+                with self.lock:
+                    self.deadline = started + self.lease_seconds - self.renew_seconds
+                return True
+            self._step_down()
+
+        token = Lease.acquire(self.name, self.holder_id, self.lease_seconds)
+        if token is None:
+            return False
+        with self.lock:
+            self.token = token
+            self.deadline = started + self.lease_seconds - self.renew_seconds
+        self.stats["acquired"] += 1
+        print(f"{self.holder_id} became {self.name} leader with fencing token {token}")
+        self._notify(True)
+        return True
+
+    def start(self):
+        if self.thread is not None:
+            return
+        try:
+            self.tick()
+        except Exception as e:
+            print(f"Initial leader election failed: {e}")
+        self.thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.renew_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Leader election failed: {e}")
+                if not self.is_leader():
+                    self._step_down()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            token = self.token
+        if token is not None:
+            try:
+                Lease.release(self.name, self.holder_id, token)
+            except Exception as e:
+                print(f"Failed to release {self.name} lease: {e}")
+            self._step_down()
+
+    def status(self):
+        with self.lock:
+            token = self.token
+        stats = dict(self.stats)
+        stats.update({
+            "name": self.name,
+            "holder_id": self.holder_id,
+            "leader": self.is_leader(),
+            "token": token
+        })
+        return stats
+
+
+def get_election(name, holder_id):
+    global election
+    with election_lock:
+        if election is None:
+            election = LeaderElection(name, holder_id)
+    return election
+
+
+def shutdown_election():
+    global election
+    with election_lock:
+        if election is not None:
+            election.stop()
+            election = None
@@ -4,11 +4,14 @@ from datetime import datetime, timedelta
 import time
 import re
 from streamlit_js_eval import streamlit_js_eval
-from models import Monitor, CheckResult, Incident, Notification, StatusPage, User
+from models import Monitor, CheckResult, CheckRollup, Incident, Notification, StatusPage, User, Worker
 from monitoring import run_check, run_all_checks
-from config import MONITOR_TYPES, MONITOR_INTERVALS, HTTP_METHODS, MONITOR_STATUS, NOTIFICATION_TYPES
+from keywords import get_keywords, invalid_patterns
+from config import MONITOR_TYPES, MONITOR_INTERVALS, HTTP_METHODS, MONITOR_STATUS, NOTIFICATION_TYPES, CONNECTION_MODES
+from config import EMBEDDED_SCHEDULER, WORKER_STATUS_STALE_SECONDS
 from database import get_database
-from scheduler import sync_all_monitors, get_scheduler_status
+from scheduler import sync_all_monitors, get_scheduler_status, notify_monitor_changed, notify_monitor_deleted, record_manual
+from monitoring import record_manual_result
 from auth import create_user, authenticate_user, get_user_by_email, validate_session, delete_session
 
 st.set_page_config(
@@ -219,6 +222,9 @@ def get_current_user_id():
         return str(st.session_state.user.get("_id", ""))
     return None
 
+def manual_recorder():
+    return record_manual if EMBEDDED_SCHEDULER else record_manual_result
+
 def logout():
     try:
         if st.session_state.session_token:
@@ -404,9 +410,9 @@ def render_sidebar():
         st.markdown("---")
         st.markdown("### Quick Actions")
         
-        if st.button("Run All Checks", use_container_width=True):
+        if EMBEDDED_SCHEDULER and st.button("Run All Checks", use_container_width=True):
             with st.spinner("Running checks..."):
-                results = run_all_checks()
+                results = run_all_checks(record=manual_recorder())
                 st.success(f"Completed {len(results)} checks")
                 time.sleep(1)
                 st.rerun()
@@ -564,8 +570,17 @@ def render_monitors():
                 with col2:
                     st.markdown("**Statistics**")
                     st.write(f"Uptime: {monitor.get('uptime_percentage', 100)}%")
+                    long_uptime = CheckRollup.get_uptime(str(monitor["_id"]))
+                    st.write(" • ".join(
+                        f"{days}d: {value}%" if value is not None else f"{days}d: N/A"
+                        for days, value in long_uptime.items()
+                    ))
                     response_time = monitor.get("last_response_time")
                     st.write(f"Response Time: {response_time}ms" if response_time else "Response Time: N/A")
+                    if monitor.get("type", "http") in ["http", "keyword"]:
+                        phases = CheckRollup.get_phase_breakdown(str(monitor["_id"]))
+                        if phases:
+                            st.caption("24h avg: " + " • ".join(f"{phase.upper()} {ms}ms" for phase, ms in phases.items()))
                     last_check = monitor.get("last_check")
                     if last_check:
                         st.write(f"Last Check: {last_check.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -580,9 +595,13 @@ def render_monitors():
                     with action_col1:
                         if st.button("Check Now", key=f"check_{monitor['_id']}"):
                             with st.spinner("Running check..."):
-                                result = run_check(monitor)
+                                result, state = run_check(monitor, record=manual_recorder())
                                 if result["status"] == "up":
                                     st.success("Monitor is UP!")
+                                elif result.get("details", {}).get("confirming"):
+                                    st.warning(f"Check failed, awaiting confirmation by the scheduler: {result.get('error', 'Unknown error')}")
+                                elif "status" not in state:
+                                    st.warning(f"Check failed, will be re-checked on the next scheduled run: {result.get('error', 'Unknown error')}")
                                 else:
                                     st.error(f"Monitor is DOWN: {result.get('error', 'Unknown error')}")
                                 time.sleep(1)
@@ -591,12 +610,14 @@ def render_monitors():
                         if monitor.get("is_paused", False):
                             if st.button("Resume", key=f"resume_{monitor['_id']}"):
                                 Monitor.update(str(monitor["_id"]), {"is_paused": False}, user_id=user_id)
+                                notify_monitor_changed(monitor["_id"])
                                 st.success("Monitor resumed!")
                                 time.sleep(0.5)
                                 st.rerun()
                         else:
                             if st.button("Pause", key=f"pause_{monitor['_id']}"):
                                 Monitor.update(str(monitor["_id"]), {"is_paused": True}, user_id=user_id)
+                                notify_monitor_changed(monitor["_id"])
                                 st.success("Monitor paused!")
                                 time.sleep(0.5)
                                 st.rerun()
@@ -608,7 +629,8 @@ def render_monitors():
                             st.rerun()
                         
                         if st.button("Delete", key=f"delete_{monitor['_id']}", type="secondary"):
-                            Monitor.delete(str(monitor["_id"]), user_id=user_id)
+                            if Monitor.delete(str(monitor["_id"]), user_id=user_id):
+                                notify_monitor_deleted(monitor["_id"])
                             st.success("Monitor deleted!")
                             time.sleep(0.5)
                             st.rerun()
@@ -642,6 +664,7 @@ def render_add_monitor():
         
         with col2:
             timeout = st.slider("Timeout (seconds)", min_value=5, max_value=60, value=30)
+            confirm_retries = st.number_input("Confirmation Retries", min_value=0, max_value=5, value=2, help="Fast re-checks that must also fail before an incident is opened")
             group = st.text_input("Group", value="default")
             tags = st.text_input("Tags (comma-separated)", placeholder="production, api, critical")
             notes = st.text_area("Notes", placeholder="Additional notes about this monitor...")
@@ -652,9 +675,15 @@ def render_add_monitor():
         http_method = "GET"
         expected_status_codes = [200, 201, 301, 302]
         follow_redirects = True
+        ssl_check = False
+        connection_mode = "warm"
         keyword = ""
+        keywords = []
         keyword_type = "exists"
+        keyword_regex = False
+        keyword_match = "any"
         port = 80
+        ping_count = 1
         ssl_expiry_threshold = 30
         domain_expiry_threshold = 30
         headers = {}
@@ -665,9 +694,11 @@ def render_add_monitor():
             with col1:
                 http_method = st.selectbox("HTTP Method", HTTP_METHODS)
                 follow_redirects = st.checkbox("Follow Redirects", value=True)
+                ssl_check = st.checkbox("Also check SSL certificate expiry", value=False)
             with col2:
                 status_codes_str = st.text_input("Expected Status Codes", value="200, 201, 301, 302")
                 expected_status_codes = [int(x.strip()) for x in status_codes_str.split(",") if x.strip().isdigit()]
+                connection_mode = st.selectbox("Connection Timing", options=list(CONNECTION_MODES.keys()), format_func=lambda x: CONNECTION_MODES[x])
             
             headers_str = st.text_area("Custom Headers (JSON format)", placeholder='{"Authorization": "Bearer token"}')
             if headers_str:
@@ -683,14 +714,21 @@ def render_add_monitor():
         if monitor_type == "keyword":
             col1, col2 = st.columns(2)
             with col1:
-                keyword = st.text_input("Keyword to Search", placeholder="Enter keyword...")
+                keywords_str = st.text_area("Keywords to Search (one per line)", placeholder="Enter keyword...")
+                keyword_regex = st.checkbox("Treat keywords as regular expressions", value=False)
             with col2:
                 keyword_type = st.selectbox("Keyword Condition", ["exists", "not_exists"], format_func=lambda x: "Keyword exists" if x == "exists" else "Keyword does not exist")
+                keyword_match = st.selectbox("Match", ["any", "all"], format_func=lambda x: "Any keyword" if x == "any" else "All keywords")
+            keywords = [k.strip() for k in keywords_str.splitlines() if k.strip()]
+            keyword = keywords[0] if keywords else ""
         
         if monitor_type == "port":
             port = st.number_input("Port Number", min_value=1, max_value=65535, value=80)
         
-        if monitor_type == "ssl":
+        if monitor_type == "ping":
+            ping_count = st.number_input("Echo Requests per Check", min_value=1, max_value=10, value=1)
+        
+        if monitor_type in ["ssl", "http", "keyword"]:
             ssl_expiry_threshold = st.slider("SSL Expiry Alert (days before)", min_value=1, max_value=90, value=30)
         
         if monitor_type == "domain":
@@ -714,6 +752,8 @@ def render_add_monitor():
                 st.error("Please enter a monitor name")
             elif not url:
                 st.error("Please enter a URL or host")
+            elif monitor_type == "keyword" and keyword_regex and invalid_patterns(keywords):
+                st.error("Invalid regular expression: " + "; ".join(invalid_patterns(keywords)))
             else:
                 tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
                 
@@ -728,11 +768,18 @@ def render_add_monitor():
                     http_method=http_method,
                     expected_status_codes=expected_status_codes,
                     keyword=keyword,
+                    keywords=keywords,
                     keyword_type=keyword_type,
+                    keyword_regex=keyword_regex,
+                    keyword_match=keyword_match,
                     port=port,
+                    ping_count=ping_count,
+                    confirm_retries=confirm_retries,
                     headers=headers,
                     body=body,
                     follow_redirects=follow_redirects,
+                    ssl_check=ssl_check,
+                    connection_mode=connection_mode,
                     ssl_expiry_threshold=ssl_expiry_threshold,
                     domain_expiry_threshold=domain_expiry_threshold,
                     notification_settings={
@@ -748,8 +795,9 @@ def render_add_monitor():
                 
                 if monitor:
                     st.success("Monitor created successfully!")
+                    notify_monitor_changed(monitor["_id"])
                     with st.spinner("Running initial check..."):
-                        run_check(monitor)
+                        run_check(monitor, record=manual_recorder())
                     time.sleep(1)
                     st.session_state.page = "monitors"
                     st.rerun()
@@ -792,6 +840,7 @@ def render_edit_monitor():
         
         with col2:
             timeout = st.slider("Timeout (seconds)", min_value=5, max_value=60, value=monitor.get("timeout", 30))
+            confirm_retries = st.number_input("Confirmation Retries", min_value=0, max_value=5, value=monitor.get("confirm_retries", 2), help="Fast re-checks that must also fail before an incident is opened")
             group = st.text_input("Group", value=monitor.get("group", "default"))
             tags = st.text_input("Tags (comma-separated)", value=", ".join(monitor.get("tags", [])))
             notes = st.text_area("Notes", value=monitor.get("notes", ""))
@@ -802,9 +851,15 @@ def render_edit_monitor():
         http_method = monitor.get("http_method", "GET")
         expected_status_codes = monitor.get("expected_status_codes", [200, 201, 301, 302])
         follow_redirects = monitor.get("follow_redirects", True)
+        ssl_check = monitor.get("ssl_check", False)
+        connection_mode = monitor.get("connection_mode", "warm")
         keyword = monitor.get("keyword", "")
+        keywords = get_keywords(monitor)
         keyword_type = monitor.get("keyword_type", "exists")
+        keyword_regex = monitor.get("keyword_regex", False)
+        keyword_match = monitor.get("keyword_match", "any")
         port = monitor.get("port", 80)
+        ping_count = monitor.get("ping_count", 1)
         ssl_expiry_threshold = monitor.get("ssl_expiry_threshold", 30)
         domain_expiry_threshold = monitor.get("domain_expiry_threshold", 30)
         headers = monitor.get("headers", {})
@@ -816,9 +871,12 @@ def render_edit_monitor():
                 method_index = HTTP_METHODS.index(http_method) if http_method in HTTP_METHODS else 0
                 http_method = st.selectbox("HTTP Method", HTTP_METHODS, index=method_index)
                 follow_redirects = st.checkbox("Follow Redirects", value=follow_redirects)
+                ssl_check = st.checkbox("Also check SSL certificate expiry", value=ssl_check)
             with col2:
                 status_codes_str = st.text_input("Expected Status Codes", value=", ".join(map(str, expected_status_codes)))
                 expected_status_codes = [int(x.strip()) for x in status_codes_str.split(",") if x.strip().isdigit()]
+                mode_keys = list(CONNECTION_MODES.keys())
+                connection_mode = st.selectbox("Connection Timing", options=mode_keys, format_func=lambda x: CONNECTION_MODES[x], index=mode_keys.index(connection_mode) if connection_mode in mode_keys else 0)
             
             import json
             headers_str = st.text_area("Custom Headers (JSON format)", value=json.dumps(headers) if headers else "")
@@ -834,15 +892,22 @@ def render_edit_monitor():
         if monitor_type == "keyword":
             col1, col2 = st.columns(2)
             with col1:
-                keyword = st.text_input("Keyword to Search", value=keyword)
+                keywords_str = st.text_area("Keywords to Search (one per line)", value="\n".join(keywords))
+                keyword_regex = st.checkbox("Treat keywords as regular expressions", value=keyword_regex)
             with col2:
                 kw_index = 0 if keyword_type == "exists" else 1
                 keyword_type = st.selectbox("Keyword Condition", ["exists", "not_exists"], format_func=lambda x: "Keyword exists" if x == "exists" else "Keyword does not exist", index=kw_index)
+                keyword_match = st.selectbox("Match", ["any", "all"], format_func=lambda x: "Any keyword" if x == "any" else "All keywords", index=0 if keyword_match == "any" else 1)
+            keywords = [k.strip() for k in keywords_str.splitlines() if k.strip()]
+            keyword = keywords[0] if keywords else ""
         
         if monitor_type == "port":
             port = st.number_input("Port Number", min_value=1, max_value=65535, value=port)
         
-        if monitor_type == "ssl":
+        if monitor_type == "ping":
+            ping_count = st.number_input("Echo Requests per Check", min_value=1, max_value=10, value=ping_count)
+        
+        if monitor_type in ["ssl", "http", "keyword"]:
             ssl_expiry_threshold = st.slider("SSL Expiry Alert (days before)", min_value=1, max_value=90, value=ssl_expiry_threshold)
         
         if monitor_type == "domain":
@@ -871,6 +936,8 @@ def render_edit_monitor():
                 st.error("Please enter a monitor name")
             elif not url:
                 st.error("Please enter a URL or host")
+            elif monitor_type == "keyword" and keyword_regex and invalid_patterns(keywords):
+                st.error("Invalid regular expression: " + "; ".join(invalid_patterns(keywords)))
             else:
                 tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
                 
@@ -883,11 +950,18 @@ def render_edit_monitor():
                     "http_method": http_method,
                     "expected_status_codes": expected_status_codes,
                     "keyword": keyword,
+                    "keywords": keywords,
                     "keyword_type": keyword_type,
+                    "keyword_regex": keyword_regex,
+                    "keyword_match": keyword_match,
                     "port": port,
+                    "ping_count": ping_count,
+                    "confirm_retries": confirm_retries,
                     "headers": headers,
                     "body": body,
                     "follow_redirects": follow_redirects,
+                    "ssl_check": ssl_check,
+                    "connection_mode": connection_mode,
                     "ssl_expiry_threshold": ssl_expiry_threshold,
                     "domain_expiry_threshold": domain_expiry_threshold,
                     "notification_settings": {
@@ -902,6 +976,7 @@ def render_edit_monitor():
                 }
                 
                 if Monitor.update(monitor_id, updates, user_id=user_id):
+                    notify_monitor_changed(monitor_id)
                     st.success("Monitor updated successfully!")
                     time.sleep(1)
                     st.session_state.page = "monitors"
@@ -1136,7 +1211,10 @@ def render_view_status_page():
         with col2:
             st.markdown(f"{status_icon} {status_text}")
         with col3:
-            st.markdown(f"{monitor.get('uptime_percentage', 100):.2f}% uptime")
+            uptime_30d = CheckRollup.get_uptime(str(monitor["_id"]), days=(30,))[30]
+            if uptime_30d is None:
+                uptime_30d = monitor.get("uptime_percentage", 100)
+            st.markdown(f"{uptime_30d:.2f}% uptime (30d)")
         
         st.markdown("---")
     
@@ -1236,21 +1314,40 @@ def render_settings():
     
     st.subheader("Background Scheduler")
     
-    scheduler_status = get_scheduler_status()
-    col1, col2 = st.columns(2)
-    with col1:
-        if scheduler_status["running"]:
-            st.success("Scheduler Running")
-        else:
-            st.warning("Scheduler Stopped")
-        st.metric("Active Jobs", scheduler_status["job_count"])
-    
-    with col2:
-        if st.button("Sync All Monitors", use_container_width=True):
-            count = sync_all_monitors()
-            st.success(f"Synced {count} monitors to scheduler")
-            time.sleep(1)
-            st.rerun()
+    if EMBEDDED_SCHEDULER:
+        scheduler_status = get_scheduler_status()
+        col1, col2 = st.columns(2)
+        with col1:
+            if scheduler_status["running"]:
+                st.success("Scheduler Running")
+            else:
+                st.warning("Scheduler Stopped")
+            st.metric("Active Jobs", scheduler_status["job_count"])
+        
+        with col2:
+            if st.button("Sync All Monitors", use_container_width=True):
+                count = sync_all_monitors()
+                st.success(f"Synced {count} monitors to scheduler")
+                time.sleep(1)
+                st.rerun()
+    else:
+        workers = Worker.get_recent(WORKER_STATUS_STALE_SECONDS)
+        if not workers:
+            st.warning("No check worker is reporting. Start one with `python -m worker`.")
+        for worker in workers:
+            status = worker.get("status", {})
+            engine = status.get("engine", {})
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.success(f"Worker {worker['_id']}")
+                st.caption(f"Last report: {worker['status_at'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
+            with col2:
+                st.metric("Active Jobs", status.get("job_count", 0))
+            with col3:
+                st.metric("Checks Completed", engine.get("completed", 0))
+            policy = status.get("policy") or {}
+            if policy.get("backed_off"):
+                st.caption(f"Adaptive intervals: {policy['backed_off']} long-down monitors backed off, reclaiming {policy['reclaimed_checks_per_hour']:.0f} checks/hour ({policy['reclaimed_check_seconds_per_hour']:.0f} probe-seconds/hour)")
     
     st.markdown("---")
     
@@ -1328,7 +1425,8 @@ def main():
         render_login_page()
         return
     
-    init_scheduler()
+    if EMBEDDED_SCHEDULER:
+        init_scheduler()
     
     render_sidebar()
     
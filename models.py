@@ -1,8 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from database import (
     get_monitors_collection, 
     get_check_results_collection, 
+    get_check_rollups_collection,
+    get_domain_whois_collection,
+    get_workers_collection,
+    get_leases_collection,
     get_incidents_collection,
     get_notifications_collection,
     get_status_pages_collection,
@@ -68,16 +74,23 @@ class Monitor:
             "uptime_percentage": 100.0,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
+            "config_version": 1,
             "is_paused": False,
             "timeout": kwargs.get("timeout", 30),
             "http_method": kwargs.get("http_method", "GET"),
             "expected_status_codes": kwargs.get("expected_status_codes", [200, 201, 301, 302]),
             "keyword": kwargs.get("keyword", ""),
+            "keywords": kwargs.get("keywords", []),
             "keyword_type": kwargs.get("keyword_type", "exists"),
+            "keyword_regex": kwargs.get("keyword_regex", False),
+            "keyword_match": kwargs.get("keyword_match", "any"),
             "port": kwargs.get("port", 80),
+            "ping_count": kwargs.get("ping_count", 1),
+            "confirm_retries": kwargs.get("confirm_retries", 2),
             "headers": kwargs.get("headers", {}),
             "body": kwargs.get("body", ""),
             "follow_redirects": kwargs.get("follow_redirects", True),
+            "connection_mode": kwargs.get("connection_mode", "warm"),
             "ssl_check": kwargs.get("ssl_check", False),
             "ssl_expiry_threshold": kwargs.get("ssl_expiry_threshold", 30),
             "domain_expiry_threshold": kwargs.get("domain_expiry_threshold", 30),
@@ -128,14 +141,61 @@ class Monitor:
             query["user_id"] = str(user_id)
         result = monitors.update_one(
             query,
-            {"$set": updates}
+            {"$set": updates, "$inc": {"config_version": 1}}
         )
         return result.modified_count > 0
     
+    @staticmethod
+    def update_states(states):
+        monitors = get_monitors_collection()
+        if monitors is None or not states:
+            return 0
+        result = monitors.bulk_write(
+            [UpdateOne({"_id": ObjectId(monitor_id)}, {"$set": state}) for monitor_id, state in states.items()],
+            ordered=False
+        )
+        return result.matched_count
+    
+    @staticmethod
+    def update_state(monitor_id, state):
+        monitors = get_monitors_collection()
+        if monitors is None:
+            return False
+        result = monitors.update_one(
+            {"_id": ObjectId(monitor_id)},
+            {"$set": state}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def get_updated_since(since):
+        monitors = get_monitors_collection()
+        if monitors is None:
+            return []
+        return list(monitors.find({"updated_at": {"$gt": since}}).sort("updated_at", 1))
+    
+    @staticmethod
+    def get_active_versions():
+        monitors = get_monitors_collection()
+        if monitors is None:
+            return {}
+        return {
+            str(doc["_id"]): doc.get("config_version", 0)
+            for doc in monitors.find({"is_paused": False}, {"_id": 1, "config_version": 1})
+        }
+    
+    @staticmethod
+    def get_many(monitor_ids):
+        monitors = get_monitors_collection()
+        if monitors is None or not monitor_ids:
+            return []
+        return list(monitors.find({"_id": {"$in": [ObjectId(mid) for mid in monitor_ids]}}))
+    
     @staticmethod
     def delete(monitor_id, user_id=None):
         monitors = get_monitors_collection()
         check_results = get_check_results_collection()
+        check_rollups = get_check_rollups_collection()
         incidents = get_incidents_collection()
         
         query = {"_id": ObjectId(monitor_id)}
@@ -148,6 +208,8 @@ class Monitor:
                 return False
         if check_results is not None:
             check_results.delete_many({"monitor_id": str(monitor_id)})
+        if check_rollups is not None:
+            check_rollups.delete_many({"monitor_id": str(monitor_id)})
         if incidents is not None:
             incidents.delete_many({"monitor_id": str(monitor_id)})
         return True
@@ -185,12 +247,8 @@ class Monitor:
 
 class CheckResult:
     @staticmethod
-    def create(monitor_id, status, response_time=None, status_code=None, error=None, details=None):
-        results = get_check_results_collection()
-        if results is None:
-            return None
-            
-        check = {
+    def build(monitor_id, status, response_time=None, status_code=None, error=None, details=None):
+        return {
             "monitor_id": str(monitor_id),
             "status": status,
             "response_time": response_time,
@@ -199,10 +257,25 @@ class CheckResult:
             "details": details or {},
             "timestamp": datetime.utcnow()
         }
-        
+    
+    @staticmethod
+    def create(monitor_id, status, response_time=None, status_code=None, error=None, details=None):
+        results = get_check_results_collection()
+        if results is None:
+            return None
+            
+        check = CheckResult.build(monitor_id, status, response_time, status_code, error, details)
         result = results.insert_one(check)
         return result.inserted_id
     
+    @staticmethod
+    def create_many(checks):
+        results = get_check_results_collection()
+        if results is None or not checks:
+            return []
+        result = results.insert_many(checks, ordered=False)
+        return result.inserted_ids
+    
     @staticmethod
     def get_by_monitor(monitor_id, limit=100):
         results = get_check_results_collection()
@@ -220,24 +293,211 @@ class CheckResult:
         return list(results.find().sort("timestamp", -1).limit(limit))
     
     @staticmethod
-    def calculate_uptime(monitor_id, hours=24):
+    def count_by_bucket(monitor_id, since, bucket_seconds):
         results = get_check_results_collection()
         if results is None:
-            return 100.0
-            
-        from datetime import timedelta
-        start_time = datetime.utcnow() - timedelta(hours=hours)
+            return []
         
-        checks = list(results.find({
+        bucket_ms = int(bucket_seconds * 1000)
+        timestamp_ms = {"$subtract": ["$timestamp", datetime(1970, 1, 1)]}
+        pipeline = [
+            {"$match": {
+                "monitor_id": str(monitor_id),
+                "timestamp": {"$gte": datetime.utcfromtimestamp(since)}
+            }},
+            {"$group": {
+                "_id": {"$subtract": [timestamp_ms, {"$mod": [timestamp_ms, bucket_ms]}]},
+                "up": {"$sum": {"$cond": [{"$eq": ["$status", "up"]}, 1, 0]}},
+                "total": {"$sum": 1}
+            }}
+        ]
+        return [
+            (doc["_id"] / 1000, doc["up"], doc["total"])
+            for doc in results.aggregate(pipeline)
+        ]
+
+class CheckRollup:
+    @staticmethod
+    def apply(updates):
+        rollups = get_check_rollups_collection()
+        if rollups is None or not updates:
+            return 0
+        result = rollups.bulk_write(updates, ordered=False)
+        return result.upserted_count + result.modified_count
+    
+    @staticmethod
+    def get_buckets(monitor_id, granularity, since):
+        rollups = get_check_rollups_collection()
+        if rollups is None:
+            return []
+        return list(rollups.find({
             "monitor_id": str(monitor_id),
-            "timestamp": {"$gte": start_time}
-        }))
+            "granularity": granularity,
+            "bucket": {"$gte": since}
+        }).sort("bucket", 1))
+    
+    @staticmethod
+    def get_uptime(monitor_id, days=(7, 30, 90)):
+        now = datetime.utcnow()
+        today = datetime(now.year, now.month, now.day)
+        buckets = CheckRollup.get_buckets(monitor_id, "day", today - timedelta(days=max(days) - 1))
         
-        if not checks:
-            return 100.0
-            
-        up_count = sum(1 for c in checks if c["status"] == "up")
-        return round((up_count / len(checks)) * 100, 2)
+        uptime = {}
+        for window in days:
+            start = today - timedelta(days=window - 1)
+            up = sum(b.get("up", 0) for b in buckets if b["bucket"] >= start)
+            total = up + sum(b.get("down", 0) for b in buckets if b["bucket"] >= start)
+            uptime[window] = round((up / total) * 100, 2) if total else None
+        return uptime
+    
+    @staticmethod
+    def get_phase_breakdown(monitor_id, hours=24):
+        buckets = CheckRollup.get_buckets(monitor_id, "hour", datetime.utcnow() - timedelta(hours=hours))
+        count = sum(b.get("phase_count", 0) for b in buckets)
+        if not count:
+            return {}
+        totals = {}
+        for bucket in buckets:
+            for phase, total in bucket.get("phase_sum", {}).items():
+                totals[phase] = totals.get(phase, 0.0) + total
+        return {phase: round(total / count, 2) for phase, total in totals.items()}
+
+class DomainWhois:
+    @staticmethod
+    def get(domain):
+        whois = get_domain_whois_collection()
+        if whois is None:
+            return None
+        return whois.find_one({"_id": domain})
+    
+    @staticmethod
+    def save(domain, expiry_date, server, chain, ttl):
+        whois = get_domain_whois_collection()
+        if whois is None:
+            return None
+        now = datetime.utcnow()
+        record = {
+            "expiry_date": expiry_date,
+            "server": server,
+            "chain": chain,
+            "fetched_at": now,
+            "refresh_at": now + ttl
+        }
+        whois.update_one({"_id": domain}, {"$set": record}, upsert=True)
+        record["_id"] = domain
+        return record
+
+class Worker:
+    @staticmethod
+    def heartbeat(worker_id, lease_seconds):
+        workers = get_workers_collection()
+        if workers is None:
+            return None
+        now = datetime.utcnow()
+        workers.update_one(
+            {"_id": worker_id},
+            {
+                "$set": {"heartbeat_at": now, "expires_at": now + timedelta(seconds=lease_seconds), "sharded": True},
+                "$setOnInsert": {"started_at": now}
+            },
+            upsert=True
+        )
+        return now
+    
+    @staticmethod
+    def get_live():
+        workers = get_workers_collection()
+        if workers is None:
+            return []
+        return [w["_id"] for w in workers.find({"sharded": True, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1})]
+    
+    @staticmethod
+    def publish_status(worker_id, status):
+        workers = get_workers_collection()
+        if workers is None:
+            return None
+        now = datetime.utcnow()
+        workers.update_one(
+            {"_id": worker_id},
+            {
+                "$set": {"status": status, "status_at": now},
+                "$setOnInsert": {"started_at": now, "sharded": False}
+            },
+            upsert=True
+        )
+        return now
+    
+    @staticmethod
+    def get_recent(stale_seconds):
+        workers = get_workers_collection()
+        if workers is None:
+            return []
+        since = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        return list(workers.find({"status_at": {"$gte": since}}).sort("started_at", 1))
+    
+    @staticmethod
+    def remove(worker_id):
+        workers = get_workers_collection()
+        if workers is None:
+            return False
+        return workers.delete_one({"_id": worker_id}).deleted_count > 0
+
+class Lease:
+    @staticmethod
+    def expiry(ttl_seconds):
+        return {"$add": ["$$NOW", int(ttl_seconds * 1000)]}
+    
+    @staticmethod
+    def acquire(name, holder, ttl_seconds):
+        leases = get_leases_collection()
+        if leases is None:
+            return None
+        try:
+            lease = leases.find_one_and_update(
+                {"_id": name, "$or": [{"$expr": {"$lte": ["$expires_at", "$$NOW"]}}, {"holder": holder}]},
+                [{
+                    "$set": {
+                        "holder": {"$literal": holder},
+                        "acquired_at": "$$NOW",
+                        "expires_at": Lease.expiry(ttl_seconds),
+                        "token": {"$add": [{"$ifNull": ["$token", 0]}, 1]}
+                    }
+                }],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None
+        return lease["token"]
+    
+    @staticmethod
+    def renew(name, holder, token, ttl_seconds):
+        leases = get_leases_collection()
+        if leases is None:
+            return False
+        result = leases.update_one(
+            {"_id": name, "holder": holder, "token": token},
+            [{"$set": {"expires_at": Lease.expiry(ttl_seconds)}}]
+        )
+        return result.matched_count == 1
+    
+    @staticmethod
+    def release(name, holder, token):
+        leases = get_leases_collection()
+        if leases is None:
+            return False
+        result = leases.update_one(
+            {"_id": name, "holder": holder, "token": token},
+            [{"$set": {"expires_at": "$$NOW"}}]
+        )
+        return result.matched_count == 1
+    
+    @staticmethod
+    def get(name):
+        leases = get_leases_collection()
+        if leases is None:
+            return None
+        return leases.find_one({"_id": name})
 
 class Incident:
     @staticmethod
@@ -287,6 +547,52 @@ class Incident:
             return True
         return False
     
+    @staticmethod
+    def open_for_monitor(monitor_id, monitor_name, incident_type="down", details=None, user_id=None):
+        incidents = get_incidents_collection()
+        if incidents is None:
+            return None
+        
+        query = {"monitor_id": str(monitor_id), "status": "ongoing"}
+        try:
+            incident = incidents.find_one_and_update(
+                query,
+                {"$setOnInsert": {
+                    "monitor_name": monitor_name,
+                    "user_id": str(user_id) if user_id else None,
+                    "type": incident_type,
+                    "details": details or {},
+                    "created_at": datetime.utcnow(),
+                    "resolved_at": None,
+                    "duration": None
+                }},
+                upsert=True,
+                projection={"_id": 1},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            incident = incidents.find_one(query, {"_id": 1})
+        return incident["_id"] if incident is not None else None
+    
+    @staticmethod
+    def resolve_by_monitor(monitor_id, incident_id=None):
+        incidents = get_incidents_collection()
+        if incidents is None:
+            return None
+        
+        resolved_at = datetime.utcnow()
+        update = [{"$set": {
+            "status": "resolved",
+            "resolved_at": resolved_at,
+            "duration": {"$divide": [{"$subtract": [resolved_at, "$created_at"]}, 1000]}
+        }}]
+        query = {"monitor_id": str(monitor_id), "status": "ongoing"}
+        if incident_id:
+            incident = incidents.find_one_and_update(dict(query, _id=ObjectId(incident_id)), update, projection={"_id": 1})
+            if incident is not None:
+                return 1
+        return incidents.update_many(query, update).modified_count
+    
     @staticmethod
     def get_ongoing(user_id=None):
         incidents = get_incidents_collection()
@@ -1,14 +1,44 @@
-import requests
-import socket
+import asyncio
+import re
 import ssl
-import subprocess
 import time
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-import OpenSSL
-from models import Monitor, CheckResult, Incident
+from models import Monitor, CheckResult, Incident, DomainWhois
+from engine import run_sync
+from http_client import declared_length, discard, fetch, get_pool, get_ssl_context, split_url
+from certificates import get_certificate_cache
+import dns_cache
+from config import HTTP_DETAIL_HEADERS, HTTP_MAX_BODY_BYTES, KEYWORD_MAX_BODY_BYTES, PING_INTERVAL
+from config import WHOIS_CACHE_MIN_TTL, WHOIS_CACHE_MAX_TTL, WHOIS_CACHE_UNPARSED_TTL
+from keywords import KeywordScanner, get_keywords
+from pinger import PingUnavailable, get_pinger
+from port_prober import probe_target
+from whois_client import WhoisError, cache_ttl, lookup, registrable_domain
+from result_writer import get_result_writer
+from uptime import get_uptime_tracker
+from confirmation import confirm_retries
+from coalescing import coalesce, fingerprint
 
-def check_http(monitor):
+PING_TIME_PATTERN = re.compile(r"time[=<]\s*([\d.]+)\s*ms")
+
+def get_host(url):
+    parsed = urlparse(url)
+    return parsed.hostname or url.replace("http://", "").replace("https://", "").split("/")[0]
+
+def down_result(error, response_time=None, details=None):
+    return {
+        "status": "down",
+        "response_time": response_time,
+        "status_code": None,
+        "error": error,
+        "details": details or {}
+    }
+
+def summarize_headers(response):
+    return {name: response.header(name) for name in HTTP_DETAIL_HEADERS if response.header(name) is not None}
+
+async def fetch_http(monitor, consumer=discard, body_limit=None):
     url = monitor.get("url", "")
     method = monitor.get("http_method", "GET")
     timeout = monitor.get("timeout", 30)
@@ -16,92 +46,106 @@ def check_http(monitor):
     expected_codes = monitor.get("expected_status_codes", [200, 201, 301, 302])
     headers = monitor.get("headers", {})
     body = monitor.get("body", "")
+    warm = monitor.get("connection_mode", "warm") == "warm"
     
     try:
-        start_time = time.time()
-        
-        request_kwargs = {
-            "method": method,
-            "url": url,
-            "timeout": timeout,
-            "allow_redirects": follow_redirects,
-            "headers": headers,
-            "verify": True
-        }
-        
-        if body and method in ["POST", "PUT", "PATCH"]:
-            request_kwargs["data"] = body
-            
-        response = requests.request(**request_kwargs)
-        response_time = round((time.time() - start_time) * 1000, 2)
+        start_time = time.perf_counter()
+        response = await asyncio.wait_for(
+            fetch(
+                method,
+                url,
+                headers=headers,
+                body=body if body and method in ["POST", "PUT", "PATCH"] else None,
+                follow_redirects=follow_redirects,
+                pool=get_pool() if warm else None,
+                consumer=consumer,
+                body_limit=body_limit or monitor.get("max_body_bytes") or HTTP_MAX_BODY_BYTES
+            ),
+            timeout
+        )
+        response_time = round((time.perf_counter() - start_time) * 1000, 2)
         
         status = "up" if response.status_code in expected_codes else "down"
         
-        return {
+        result = {
             "status": status,
             "response_time": response_time,
             "status_code": response.status_code,
             "error": None if status == "up" else f"Unexpected status code: {response.status_code}",
             "details": {
-                "content_length": len(response.content),
-                "headers": dict(response.headers)
+                "content_length": declared_length(response) or response.bytes_read,
+                "body_truncated": not response.complete,
+                "headers": summarize_headers(response),
+                "connection_reused": response.reused,
+                "timings": {phase: round(ms, 2) for phase, ms in response.timings.items()}
             }
         }
+        if response.peer_cert:
+            _, host, port, _ = split_url(response.url)
+            get_certificate_cache().observe(host, port, response.peer_cert)
+            if monitor.get("ssl_check"):
+                apply_certificate(result, response.peer_cert, monitor.get("ssl_expiry_threshold", 30))
+        return result, response
         
-    except requests.exceptions.Timeout:
-        return {
-            "status": "down",
-            "response_time": timeout * 1000,
-            "status_code": None,
-            "error": "Request timeout",
-            "details": {}
-        }
-    except requests.exceptions.ConnectionError as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": f"Connection error: {str(e)}",
-            "details": {}
-        }
+    except asyncio.TimeoutError:
+        return down_result("Request timeout", response_time=timeout * 1000), None
+    except OSError as e:
+        return down_result(f"Connection error: {str(e)}"), None
     except Exception as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": str(e),
-            "details": {}
-        }
+        return down_result(str(e)), None
 
-def check_keyword(monitor):
-    result = check_http(monitor)
-    
-    if result["status"] == "down":
-        return result
-        
-    keyword = monitor.get("keyword", "")
+def apply_certificate(result, cert_bin, threshold):
+    try:
+        certificate = get_certificate_cache().details(cert_bin)
+    except Exception as e:
+        result["details"]["ssl"] = {"error": str(e)}
+        return
+    result["details"]["ssl"] = certificate
+    if result["status"] == "up" and certificate["days_until_expiry"] <= threshold:
+        result["status"] = "down"
+        result["error"] = f"SSL expires in {certificate['days_until_expiry']} days"
+
+async def probe_http(monitor):
+    result, response = await fetch_http(monitor)
+    return result
+
+async def probe_keyword(monitor):
+    keywords = get_keywords(monitor)
     keyword_type = monitor.get("keyword_type", "exists")
     
-    if not keyword:
+    if not keywords:
+        return await probe_http(monitor)
+    
+    try:
+        scanner = KeywordScanner(
+            keywords,
+            regex=monitor.get("keyword_regex", False),
+            match=monitor.get("keyword_match", "any")
+        )
+    except re.error as e:
+        return down_result(f"Invalid keyword pattern: {e}")
+    result, response = await fetch_http(
+        monitor,
+        consumer=scanner.feed,
+        body_limit=monitor.get("max_body_bytes") or KEYWORD_MAX_BODY_BYTES
+    )
+    
+    if result["status"] == "down":
         return result
         
     try:
-        url = monitor.get("url", "")
-        response = requests.get(url, timeout=monitor.get("timeout", 30))
-        content = response.text
-        
-        keyword_found = keyword.lower() in content.lower()
+        keyword_found = scanner.finish()
+        result["details"]["keyword_found"] = keyword_found
+        result["details"]["keywords_found"] = scanner.found_keywords()
+        result["details"]["bytes_scanned"] = scanner.bytes_scanned
         
         if keyword_type == "exists" and keyword_found:
             result["status"] = "up"
-            result["details"]["keyword_found"] = True
         elif keyword_type == "not_exists" and not keyword_found:
             result["status"] = "up"
-            result["details"]["keyword_found"] = False
         else:
             result["status"] = "down"
-            result["error"] = f"Keyword '{keyword}' {'not found' if keyword_type == 'exists' else 'found'}"
-            result["details"]["keyword_found"] = keyword_found
+            result["error"] = f"Keyword '{', '.join(keywords)}' {'not found' if keyword_type == 'exists' else 'found'}"
             
     except Exception as e:
         result["status"] = "down"
@@ -109,145 +153,107 @@ def check_keyword(monitor):
         
     return result
 
-def check_ping(monitor):
-    url = monitor.get("url", "")
+async def probe_ping(monitor):
+    host = get_host(monitor.get("url", ""))
     timeout = monitor.get("timeout", 10)
+    count = max(int(monitor.get("ping_count", 1) or 1), 1)
     
-    parsed = urlparse(url)
-    host = parsed.hostname or url.replace("http://", "").replace("https://", "").split("/")[0]
+    try:
+        stats = await get_pinger().ping(host, count=count, interval=PING_INTERVAL, timeout=timeout)
+    except PingUnavailable:
+        return await probe_ping_subprocess(host, timeout)
+    except Exception as e:
+        return down_result(str(e))
     
+    if stats["received"]:
+        return {
+            "status": "up",
+            "response_time": stats["avg"],
+            "status_code": None,
+            "error": None,
+            "details": stats
+        }
+    return down_result("Host unreachable", details=stats)
+
+async def probe_ping_subprocess(host, timeout):
     try:
         start_time = time.time()
-        result = subprocess.run(
-            ["ping", "-c", "1", "-W", str(timeout), host],
-            capture_output=True,
-            text=True,
-            timeout=timeout + 5
+        process = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", str(timeout), host,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
         )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout + 5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return down_result("Ping timeout")
         response_time = round((time.time() - start_time) * 1000, 2)
+        output = stdout.decode(errors="replace")
         
-        if result.returncode == 0:
-            for line in result.stdout.split('\n'):
-                if 'time=' in line:
-                    time_str = line.split('time=')[1].split()[0]
-                    response_time = float(time_str.replace('ms', ''))
-                    break
+        if process.returncode == 0:
+            match = PING_TIME_PATTERN.search(output)
+            if match:
+                response_time = float(match.group(1))
                     
             return {
                 "status": "up",
                 "response_time": response_time,
                 "status_code": None,
                 "error": None,
-                "details": {"output": result.stdout}
+                "details": {"output": output}
             }
         else:
-            return {
-                "status": "down",
-                "response_time": None,
-                "status_code": None,
-                "error": "Host unreachable",
-                "details": {"output": result.stderr}
-            }
+            return down_result("Host unreachable", details={"output": stderr.decode(errors="replace")})
             
-    except subprocess.TimeoutExpired:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": "Ping timeout",
-            "details": {}
-        }
     except Exception as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": str(e),
-            "details": {}
-        }
+        return down_result(str(e))
 
-def check_port(monitor):
-    url = monitor.get("url", "")
+async def probe_port(monitor):
+    host = get_host(monitor.get("url", ""))
     port = monitor.get("port", 80)
     timeout = monitor.get("timeout", 10)
     
-    parsed = urlparse(url)
-    host = parsed.hostname or url.replace("http://", "").replace("https://", "").split("/")[0]
+    target = await probe_target(host, port, timeout)
+    details = {key: target[key] for key in ("port", "address", "family", "resolve_ms", "connect_ms") if key in target}
+    if not target["open"]:
+        return down_result(target["error"], details=details)
     
-    try:
-        start_time = time.time()
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        response_time = round((time.time() - start_time) * 1000, 2)
-        sock.close()
-        
-        if result == 0:
-            return {
-                "status": "up",
-                "response_time": response_time,
-                "status_code": None,
-                "error": None,
-                "details": {"port": port}
-            }
-        else:
-            return {
-                "status": "down",
-                "response_time": None,
-                "status_code": None,
-                "error": f"Port {port} is closed",
-                "details": {"port": port}
-            }
-            
-    except socket.timeout:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": "Connection timeout",
-            "details": {"port": port}
-        }
-    except Exception as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": str(e),
-            "details": {"port": port}
-        }
+    return {
+        "status": "up",
+        "response_time": target["connect_ms"],
+        "status_code": None,
+        "error": None,
+        "details": details
+    }
 
-def check_ssl(monitor):
+async def probe_ssl(monitor):
     url = monitor.get("url", "")
     threshold = monitor.get("ssl_expiry_threshold", 30)
     
     parsed = urlparse(url)
-    host = parsed.hostname or url.replace("https://", "").replace("http://", "").split("/")[0]
+    host = get_host(url)
     port = parsed.port or 443
     
     try:
         start_time = time.time()
         
-        context = ssl.create_default_context()
-        conn = context.wrap_socket(
-            socket.socket(socket.AF_INET),
-            server_hostname=host
-        )
-        conn.settimeout(10)
-        conn.connect((host, port))
-        
-        cert_bin = conn.getpeercert(binary_form=True)
-        x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_ASN1, cert_bin)
+        cert_bin = get_certificate_cache().recent(host, port)
+        reused = cert_bin is not None
+        if not reused:
+            reader, writer = await asyncio.wait_for(
+                dns_cache.open_connection(host, port, ssl=get_ssl_context(), server_hostname=host),
+                10
+            )
+            cert_bin = writer.get_extra_info("ssl_object").getpeercert(binary_form=True)
+            writer.close()
+            get_certificate_cache().observe(host, port, cert_bin)
         
         response_time = round((time.time() - start_time) * 1000, 2)
-        
-        expiry_date_str = x509.get_notAfter().decode('utf-8')
-        expiry_date = datetime.strptime(expiry_date_str, '%Y%m%d%H%M%SZ')
-        days_until_expiry = (expiry_date - datetime.utcnow()).days
-        
-        issuer = dict(x509.get_issuer().get_components())
-        subject = dict(x509.get_subject().get_components())
-        
-        conn.close()
+        details = get_certificate_cache().details(cert_bin)
+        details["handshake_reused"] = reused
+        days_until_expiry = details["days_until_expiry"]
         
         status = "up" if days_until_expiry > threshold else "down"
         
@@ -256,165 +262,182 @@ def check_ssl(monitor):
             "response_time": response_time,
             "status_code": None,
             "error": None if status == "up" else f"SSL expires in {days_until_expiry} days",
-            "details": {
-                "expiry_date": expiry_date.isoformat(),
-                "days_until_expiry": days_until_expiry,
-                "issuer": {k.decode(): v.decode() for k, v in issuer.items()},
-                "subject": {k.decode(): v.decode() for k, v in subject.items()}
-            }
+            "details": details
         }
         
     except ssl.SSLError as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": f"SSL Error: {str(e)}",
-            "details": {}
-        }
+        return down_result(f"SSL Error: {str(e)}")
+    except asyncio.TimeoutError:
+        return down_result("Connection timeout")
     except Exception as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": str(e),
-            "details": {}
-        }
+        return down_result(str(e))
 
-def check_domain(monitor):
+async def probe_domain(monitor):
     url = monitor.get("url", "")
     threshold = monitor.get("domain_expiry_threshold", 30)
-    
-    parsed = urlparse(url)
-    domain = parsed.hostname or url.replace("http://", "").replace("https://", "").split("/")[0]
+    domain = registrable_domain(get_host(url))
+    loop = asyncio.get_running_loop()
     
     try:
-        import subprocess
         start_time = time.time()
+        record = await loop.run_in_executor(None, DomainWhois.get, domain)
+        cached = record is not None and record["refresh_at"] > datetime.utcnow()
+        stale = False
         
-        result = subprocess.run(
-            ["whois", domain],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        response_time = round((time.time() - start_time) * 1000, 2)
+        if not cached:
+            try:
+                found = await lookup(domain)
+                ttl = cache_ttl(found["expiry_date"], WHOIS_CACHE_MIN_TTL, WHOIS_CACHE_MAX_TTL, WHOIS_CACHE_UNPARSED_TTL)
+                saved = await loop.run_in_executor(
+                    None, DomainWhois.save, domain, found["expiry_date"], found["server"], found["chain"], ttl
+                )
+                record = saved or {"expiry_date": found["expiry_date"], "server": found["server"]}
+            except WhoisError as e:
+                if record is None:
+                    return down_result(str(e), details={"domain": domain})
+                stale = True
         
-        output = result.stdout.lower()
-        expiry_date = None
-        
-        expiry_patterns = [
-            "expiry date:", "expiration date:", "registry expiry date:",
-            "registrar registration expiration date:", "expires on:", "expire date:"
-        ]
+        response_time = round((time.time() - start_time) * 1000, 2)
+        expiry_date = record["expiry_date"]
+        details = {
+            "domain": domain,
+            "whois_server": record.get("server"),
+            "cached": cached,
+            "stale": stale
+        }
         
-        for line in output.split('\n'):
-            for pattern in expiry_patterns:
-                if pattern in line.lower():
-                    date_str = line.split(':', 1)[1].strip()
-                    try:
-                        from dateutil import parser
-                        expiry_date = parser.parse(date_str)
-                        break
-                    except:
-                        pass
-            if expiry_date:
-                break
-                
         if expiry_date:
-            days_until_expiry = (expiry_date - datetime.now()).days
+            days_until_expiry = (expiry_date - datetime.utcnow()).days
             status = "up" if days_until_expiry > threshold else "down"
+            details["expiry_date"] = expiry_date.isoformat()
+            details["days_until_expiry"] = days_until_expiry
             
             return {
                 "status": status,
                 "response_time": response_time,
                 "status_code": None,
                 "error": None if status == "up" else f"Domain expires in {days_until_expiry} days",
-                "details": {
-                    "expiry_date": expiry_date.isoformat(),
-                    "days_until_expiry": days_until_expiry,
-                    "domain": domain
-                }
+                "details": details
             }
         else:
+            details["message"] = "Could not parse expiry date"
             return {
                 "status": "up",
                 "response_time": response_time,
                 "status_code": None,
                 "error": None,
-                "details": {
-                    "message": "Could not parse expiry date",
-                    "domain": domain
-                }
+                "details": details
             }
             
     except Exception as e:
-        return {
-            "status": "down",
-            "response_time": None,
-            "status_code": None,
-            "error": str(e),
-            "details": {}
-        }
+        return down_result(str(e))
 
-def run_check(monitor):
-    monitor_type = monitor.get("type", "http")
-    
-    check_functions = {
-        "http": check_http,
-        "keyword": check_keyword,
-        "ping": check_ping,
-        "port": check_port,
-        "ssl": check_ssl,
-        "domain": check_domain
-    }
-    
-    check_func = check_functions.get(monitor_type, check_http)
-    result = check_func(monitor)
-    
+PROBES = {
+    "http": probe_http,
+    "keyword": probe_keyword,
+    "ping": probe_ping,
+    "port": probe_port,
+    "ssl": probe_ssl,
+    "domain": probe_domain
+}
+
+async def probe(monitor):
+    probe_func = PROBES.get(monitor.get("type", "http"), probe_http)
+    return await coalesce(fingerprint(monitor), lambda: probe_func(monitor))
+
+def check_http(monitor):
+    return run_sync(probe_http(monitor))
+
+def check_keyword(monitor):
+    return run_sync(probe_keyword(monitor))
+
+def check_ping(monitor):
+    return run_sync(probe_ping(monitor))
+
+def check_port(monitor):
+    return run_sync(probe_port(monitor))
+
+def check_ssl(monitor):
+    return run_sync(probe_ssl(monitor))
+
+def check_domain(monitor):
+    return run_sync(probe_domain(monitor))
+
+def save_state(monitor_id, state, scheduled):
+    if scheduled:
+        get_result_writer().submit_state(monitor_id, state)
+    else:
+        Monitor.update_state(monitor_id, state)
+
+def record_result(monitor, result, confirming=None, scheduled=False, held=False):
     monitor_id = str(monitor["_id"])
-    CheckResult.create(
+    if confirming:
+        result.setdefault("details", {})["confirming"] = {
+            "attempt": confirming,
+            "retries": confirm_retries(monitor)
+        }
+    get_result_writer().submit(CheckResult.build(
         monitor_id=monitor_id,
         status=result["status"],
         response_time=result.get("response_time"),
         status_code=result.get("status_code"),
         error=result.get("error"),
         details=result.get("details", {})
-    )
+    ), fenced=scheduled)
     
     previous_status = monitor.get("status", "pending")
     user_id = monitor.get("user_id")
     
+    if confirming or held:
+        state = {
+            "last_check": datetime.utcnow(),
+            "last_response_time": result.get("response_time"),
+            "uptime_percentage": get_uptime_tracker().record(monitor_id, result["status"])
+        }
+        save_state(monitor_id, state, scheduled)
+        return state
+    
+    state = {
+        "status": result["status"],
+        "last_check": datetime.utcnow(),
+        "last_response_time": result.get("response_time"),
+        "uptime_percentage": get_uptime_tracker().record(monitor_id, result["status"])
+    }
     if result["status"] == "down" and previous_status != "down":
-        Incident.create(
+        incident_id = Incident.open_for_monitor(
             monitor_id=monitor_id,
             monitor_name=monitor.get("name", "Unknown"),
             incident_type="down",
             details={"error": result.get("error")},
             user_id=user_id
         )
+        state["open_incident_id"] = str(incident_id) if incident_id else None
     elif result["status"] == "up" and previous_status == "down":
-        ongoing = Incident.get_ongoing(user_id=user_id)
-        for incident in ongoing:
-            if incident["monitor_id"] == monitor_id:
-                Incident.resolve(str(incident["_id"]), user_id=user_id)
-    
-    uptime = CheckResult.calculate_uptime(monitor_id)
-    Monitor.update(monitor_id, {
-        "status": result["status"],
-        "last_check": datetime.utcnow(),
-        "last_response_time": result.get("response_time"),
-        "uptime_percentage": uptime
-    })
-    
-    return result
+        Incident.resolve_by_monitor(monitor_id, monitor.get("open_incident_id"))
+        state["open_incident_id"] = None
+    save_state(monitor_id, state, scheduled)
+    return state
+
+def needs_confirmation(monitor, result):
+    return result["status"] == "down" and monitor.get("status") != "down" and confirm_retries(monitor) > 0
+
+def record_manual_result(monitor, result):
+    return record_result(monitor, result, held=needs_confirmation(monitor, result))
+
+def run_check(monitor, record=record_manual_result):
+    result = run_sync(probe(monitor))
+    state = record(monitor, result)
+    return result, state
+
+async def probe_many(monitors):
+    return await asyncio.gather(*(probe(monitor) for monitor in monitors))
 
-def run_all_checks():
+def run_all_checks(record=record_manual_result):
     monitors = Monitor.get_active_monitors()
     results = []
     
-    for monitor in monitors:
-        result = run_check(monitor)
+    for monitor, result in zip(monitors, run_sync(probe_many(monitors))):
+        record(monitor, result)
         results.append({
             "monitor": monitor["name"],
             "result": result
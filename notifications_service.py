@@ -147,8 +147,8 @@ Details: {details}
     else:
         return {"success": False, "error": "Unknown notification type"}
 
-def broadcast_alert(monitor_name, status, details=""):
-    notifications = Notification.get_all()
+def broadcast_alert(monitor_name, status, details="", user_id=None):
+    notifications = Notification.get_all(user_id=user_id)
     results = []
     
     for notification in notifications:
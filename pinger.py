@@ -0,0 +1,165 @@
+import asyncio
+import os
+import socket
+import statistics
+import struct
+import time
+from dns_cache import resolve
+
+ICMP_ECHO_REQUEST = {socket.AF_INET: 8, socket.AF_INET6: 128}
+ICMP_ECHO_REPLY = {socket.AF_INET: 0, socket.AF_INET6: 129}
+ICMP_PROTOCOL = {socket.AF_INET: socket.IPPROTO_ICMP, socket.AF_INET6: socket.IPPROTO_ICMPV6}
+
+_pinger = None
+
+
+class PingUnavailable(Exception):
+    pass
+
+
+def checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo(family, ident, seq, payload):
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST[family], 0, 0, ident, seq)
+    if family == socket.AF_INET6:
+        return header + payload
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST[family], 0, checksum(header + payload), ident, seq) + payload
+
+
+class ICMPSocket:
+    def __init__(self, family, loop, on_reply):
+        self.family = family
+        self.loop = loop
+        self.on_reply = on_reply
+        self.raw = False
+        try:
+            self.sock = socket.socket(family, socket.SOCK_DGRAM, ICMP_PROTOCOL[family])
+        except PermissionError:
+            try:
+                self.sock = socket.socket(family, socket.SOCK_RAW, ICMP_PROTOCOL[family])
+                self.raw = True
+            except PermissionError as e:
+                raise PingUnavailable(f"ICMP sockets not permitted: {e}")
+        self.sock.setblocking(False)
+        self.ident = self.sock.getsockname()[1] if not self.raw else os.getpid() & 0xFFFF
+        loop.add_reader(self.sock.fileno(), self._readable)
+
+    def send(self, address, seq, payload):
+        packet = build_echo(self.family, self.ident, seq, payload)
+        self.sock.sendto(packet, (address, 0))
+
+    def _readable(self):
+        while True:
+            try:
+                data, source = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            received = time.perf_counter()
+            if self.raw and self.family == socket.AF_INET:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if icmp_type != ICMP_ECHO_REPLY[self.family]:
+                continue
+            if self.raw and ident != self.ident:
+                continue
+            self.on_reply(source[0], seq, received)
+
+    def close(self):
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+
+class Pinger:
+    def __init__(self):
+        self.sockets = {}
+        self.pending = {}
+        self.seq = 0
+        self.sent = 0
+        self.received = 0
+
+    def _socket(self, family):
+        sock = self.sockets.get(family)
+        if sock is None:
+            sock = ICMPSocket(family, asyncio.get_running_loop(), self._on_reply)
+            self.sockets[family] = sock
+        return sock
+
+    def _next_seq(self, address):
+        for _ in range(0x10000):
+            self.seq = (self.seq + 1) & 0xFFFF
+            if (address, self.seq) not in self.pending:
+                return self.seq
+        raise RuntimeError("No free ICMP sequence numbers")
+
+    def _on_reply(self, address, seq, received):
+        future = self.pending.pop((address, seq), None)
+        if future is not None and not future.done():
+            self.received += 1
+            future.set_result(received)
+
+    async def probe(self, family, address, timeout):
+        sock = self._socket(family)
+        seq = self._next_seq(address)
+        key = (address, seq)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        sent = time.perf_counter()
+        try:
+            sock.send(address, seq, struct.pack("!d", sent))
+            self.sent += 1
+            received = await asyncio.wait_for(future, timeout)
+            return (received - sent) * 1000
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending.pop(key, None)
+
+    async def ping(self, host, count=1, interval=0.2, timeout=5):
+        family, address = (await resolve(host))[0]
+        tasks = []
+        for index in range(count):
+            if index:
+                await asyncio.sleep(interval)
+            tasks.append(asyncio.ensure_future(self.probe(family, address, timeout)))
+        rtts = [rtt for rtt in await asyncio.gather(*tasks) if rtt is not None]
+
+        stats = {
+            "address": address,
+            "sent": count,
+            "received": len(rtts),
+            "packet_loss": round((1 - len(rtts) / count) * 100, 2)
+        }
+        if rtts:
+            stats["min"] = round(min(rtts), 3)
+            stats["avg"] = round(statistics.fmean(rtts), 3)
+            stats["max"] = round(max(rtts), 3)
+            stats["jitter"] = round(
+                statistics.fmean(abs(b - a) for a, b in zip(rtts, rtts[1:])), 3
+            ) if len(rtts) > 1 else 0.0
+        return stats
+
+    def status(self):
+        return {
+            "sockets": {socket.AddressFamily(f).name: ("raw" if s.raw else "dgram") for f, s in self.sockets.items()},
+            "pending": len(self.pending),
+            "sent": self.sent,
+            "received": self.received
+        }
+
+
+def get_pinger():
+    global _pinger
+    if _pinger is None:
+        _pinger = Pinger()
+    return _pinger
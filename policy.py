@@ -0,0 +1,136 @@
+import threading
+from config import (
+    ADAPTIVE_INTERVALS,
+    BACKOFF_AFTER_CHECKS,
+    BACKOFF_MAX_SECONDS,
+    FAST_CHECKS,
+    FAST_INTERVAL_DIVISOR,
+    FAST_MIN_INTERVAL_SECONDS,
+    LATENCY_SPIKE_RATIO,
+    LATENCY_EWMA_ALPHA
+)
+
+policy = None
+policy_lock = threading.Lock()
+
+
+class MonitorPolicy:
+    __slots__ = ("base", "interval", "down_checks", "fast_remaining", "latency", "cost")
+
+    def __init__(self, base):
+        self.base = base
+        self.interval = base
+        self.down_checks = 0
+        self.fast_remaining = 0
+        self.latency = None
+        self.cost = 0.0
+
+
+class IntervalPolicy:
+    def __init__(self, enabled=ADAPTIVE_INTERVALS):
+        self.enabled = enabled
+        self.states = {}
+        self.lock = threading.Lock()
+        self.stats = {"backoffs": 0, "speedups": 0, "latency_spikes": 0, "recoveries": 0}
+
+    def _state(self, monitor_id, base):
+        state = self.states.get(monitor_id)
+        if state is None or state.base != base:
+            state = MonitorPolicy(base)
+            self.states[monitor_id] = state
+        return state
+
+    def interval(self, monitor):
+        base = monitor.get("interval", 300)
+        if not self.enabled:
+            return base
+        with self.lock:
+            return self._state(str(monitor["_id"]), base).interval
+
+    def observe(self, monitor, previous_status, result):
+        base = monitor.get("interval", 300)
+        if not self.enabled:
+            return base
+        status = result["status"]
+        response_time = result.get("response_time")
+        with self.lock:
+            state = self._state(str(monitor["_id"]), base)
+            state.cost = (response_time or monitor.get("timeout", 30) * 1000) / 1000.0
+
+            if previous_status in ("up", "down") and status != previous_status:
+                state.fast_remaining = FAST_CHECKS
+                self.stats["speedups"] += 1
+                if status == "up":
+                    self.stats["recoveries"] += 1
+
+            if status == "down":
+                state.down_checks += 1
+            else:
+                state.down_checks = 0
+                if response_time:
+                    if state.latency and response_time > state.latency * LATENCY_SPIKE_RATIO:
+                        if not state.fast_remaining:
+                            self.stats["latency_spikes"] += 1
+                        state.fast_remaining = FAST_CHECKS
+                    if state.latency is None:
+                        state.latency = response_time
+                    else:
+                        state.latency += LATENCY_EWMA_ALPHA * (response_time - state.latency)
+
+            if state.fast_remaining:
+                state.fast_remaining -= 1
+                interval = min(base, max(base / FAST_INTERVAL_DIVISOR, FAST_MIN_INTERVAL_SECONDS))
+            elif state.down_checks > BACKOFF_AFTER_CHECKS:
+                ceiling = max(base, BACKOFF_MAX_SECONDS)
+                interval = min(base * 2 ** (state.down_checks - BACKOFF_AFTER_CHECKS), ceiling)
+                if interval > state.interval:
+                    self.stats["backoffs"] += 1
+            else:
+                interval = base
+            state.interval = interval
+            return interval
+
+    def forget(self, monitor_id):
+        with self.lock:
+            self.states.pop(str(monitor_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+    def status(self):
+        with self.lock:
+            states = list(self.states.values())
+            stats = dict(self.stats)
+        reclaimed = 0.0
+        reclaimed_seconds = 0.0
+        extra = 0.0
+        backed_off = 0
+        fast = 0
+        for state in states:
+            saved = 3600.0 / state.base - 3600.0 / state.interval
+            if saved > 0:
+                backed_off += 1
+                reclaimed += saved
+                reclaimed_seconds += saved * state.cost
+            elif saved < 0:
+                fast += 1
+                extra -= saved
+        stats.update({
+            "enabled": self.enabled,
+            "monitors": len(states),
+            "backed_off": backed_off,
+            "fast": fast,
+            "reclaimed_checks_per_hour": round(reclaimed, 1),
+            "reclaimed_check_seconds_per_hour": round(reclaimed_seconds, 1),
+            "extra_checks_per_hour": round(extra, 1)
+        })
+        return stats
+
+
+def get_interval_policy():
+    global policy
+    with policy_lock:
+        if policy is None:
+            policy = IntervalPolicy()
+    return policy
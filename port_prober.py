@@ -0,0 +1,90 @@
+import asyncio
+import socket
+import time
+from config import PORT_CONNECT_STAGGER
+from dns_cache import resolve
+
+FAMILY_NAMES = {socket.AF_INET: "ipv4", socket.AF_INET6: "ipv6"}
+
+
+def interleave(addresses, port):
+    by_family = {}
+    for family, address in addresses:
+        sockaddr = (address, port, 0, 0) if family == socket.AF_INET6 else (address, port)
+        by_family.setdefault(family, []).append((family, socket.IPPROTO_TCP, sockaddr))
+    queues = list(by_family.values())
+    ordered = []
+    while queues:
+        for queue in list(queues):
+            ordered.append(queue.pop(0))
+            if not queue:
+                queues.remove(queue)
+    return ordered
+
+
+async def attempt(loop, family, proto, sockaddr):
+    sock = socket.socket(family, socket.SOCK_STREAM, proto)
+    try:
+        sock.setblocking(False)
+        started = time.perf_counter()
+        await loop.sock_connect(sock, sockaddr)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        sock.close()
+
+
+async def connect(host, port, stagger=PORT_CONNECT_STAGGER):
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    addresses = await resolve(host)
+    resolve_ms = (time.perf_counter() - started) * 1000
+
+    candidates = interleave(addresses, port)
+    tasks = {}
+    error = None
+    try:
+        for index, (family, proto, sockaddr) in enumerate(candidates):
+            task = asyncio.ensure_future(attempt(loop, family, proto, sockaddr))
+            tasks[task] = (family, sockaddr)
+            pending = set(tasks)
+            if index < len(candidates) - 1:
+                done, _ = await asyncio.wait(pending, timeout=stagger, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                done = set()
+
+            while True:
+                for task in done:
+                    family, sockaddr = tasks.pop(task)
+                    if task.exception() is None:
+                        return {
+                            "address": sockaddr[0],
+                            "family": FAMILY_NAMES.get(family, str(family)),
+                            "resolve_ms": round(resolve_ms, 2),
+                            "connect_ms": round(task.result(), 2),
+                            "attempts": index + 1
+                        }
+                    error = task.exception()
+                if index < len(candidates) - 1 or not tasks:
+                    break
+                done, _ = await asyncio.wait(set(tasks), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    raise error
+
+
+async def probe_target(host, port, timeout, stagger=PORT_CONNECT_STAGGER):
+    try:
+        result = await asyncio.wait_for(connect(host, port, stagger), timeout)
+        result.update({"host": host, "port": port, "open": True, "error": None})
+        return result
+    except asyncio.TimeoutError:
+        error = "Connection timeout"
+    except ConnectionRefusedError:
+        error = f"Port {port} is closed"
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+    return {"host": host, "port": port, "open": False, "error": error}
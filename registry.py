@@ -0,0 +1,193 @@
+import threading
+import time
+from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+from database import get_monitors_collection
+from models import Monitor
+from config import REGISTRY_POLL_SECONDS, REGISTRY_RECONCILE_SECONDS
+
+registry = None
+registry_lock = threading.Lock()
+
+CONFIG_CHANGE_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace", "delete"]}},
+        {"updateDescription.updatedFields.updated_at": {"$exists": True}}
+    ]}}
+]
+
+
+class MonitorRegistry:
+    def __init__(self, poll_interval=REGISTRY_POLL_SECONDS, reconcile_interval=REGISTRY_RECONCILE_SECONDS):
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.last_reconcile = time.monotonic()
+        self.monitors = {}
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None
+        self.last_updated_at = None
+        self.resume_token = None
+        self.events = 0
+        self.reconciled_changes = 0
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, monitor_id, monitor):
+        for listener in self.listeners:
+            try:
+                listener(monitor_id, monitor)
+            except Exception as e:
+                print(f"Registry listener failed for {monitor_id}: {e}")
+
+    def get(self, monitor_id):
+        with self.lock:
+            return self.monitors.get(str(monitor_id))
+
+    def all(self):
+        with self.lock:
+            return list(self.monitors.values())
+
+    def __len__(self):
+        with self.lock:
+            return len(self.monitors)
+
+    def apply(self, monitor):
+        monitor_id = str(monitor["_id"])
+        if monitor.get("is_paused", False):
+            self.discard(monitor_id)
+            return
+        with self.lock:
+            self.monitors[monitor_id] = monitor
+            updated_at = monitor.get("updated_at")
+            if updated_at and (self.last_updated_at is None or updated_at > self.last_updated_at):
+                self.last_updated_at = updated_at
+        self._notify(monitor_id, monitor)
+
+    def discard(self, monitor_id):
+        monitor_id = str(monitor_id)
+        with self.lock:
+            removed = self.monitors.pop(monitor_id, None)
+        if removed is not None:
+            self._notify(monitor_id, None)
+
+    def update_state(self, monitor_id, state):
+        monitor_id = str(monitor_id)
+        with self.lock:
+            monitor = self.monitors.get(monitor_id)
+            if monitor is not None:
+                self.monitors[monitor_id] = {**monitor, **state}
+
+    def load(self):
+        monitors = Monitor.get_active_monitors()
+        with self.lock:
+            self.monitors = {str(m["_id"]): m for m in monitors}
+            stamps = [m["updated_at"] for m in monitors if m.get("updated_at")]
+            self.last_updated_at = max(stamps) if stamps else datetime.utcnow()
+        return len(monitors)
+
+    def refresh(self, monitor_id):
+        monitor = Monitor.get_by_id(monitor_id)
+        if monitor is None:
+            self.discard(monitor_id)
+        else:
+            self.apply(monitor)
+        return monitor
+
+    def reconcile(self):
+        self.last_reconcile = time.monotonic()
+        versions = Monitor.get_active_versions()
+        with self.lock:
+            known = {mid: m.get("config_version", 0) for mid, m in self.monitors.items()}
+        changed = [mid for mid, version in versions.items() if known.get(mid) != version]
+        removed = [mid for mid in known if mid not in versions]
+        for monitor in Monitor.get_many(changed):
+            self.apply(monitor)
+        for monitor_id in removed:
+            self.discard(monitor_id)
+        self.reconciled_changes += len(changed) + len(removed)
+        return len(changed) + len(removed)
+
+    def _maybe_reconcile(self):
+        if time.monotonic() - self.last_reconcile >= self.reconcile_interval:
+            self.reconcile()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.load()
+        self.thread = threading.Thread(target=self._run, name="monitor-registry", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            collection = get_monitors_collection()
+            if collection is None:
+                self.stop_event.wait(self.poll_interval)
+                continue
+            try:
+                self._watch(collection)
+            except OperationFailure as e:
+                print(f"Change streams unavailable, polling monitors instead: {e}")
+                self._poll()
+            except PyMongoError as e:
+                print(f"Monitor change stream interrupted: {e}")
+                self.stop_event.wait(self.poll_interval)
+            except Exception as e:
+                print(f"Monitor registry error: {e}")
+                self._poll()
+
+    def _watch(self, collection):
+        with collection.watch(
+            CONFIG_CHANGE_PIPELINE,
+            full_document="updateLookup",
+            resume_after=self.resume_token,
+            max_await_time_ms=1000
+        ) as stream:
+            self.mode = "change_stream"
+            while not self.stop_event.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    self._maybe_reconcile()
+                    continue
+                self.resume_token = stream.resume_token
+                self.events += 1
+                monitor_id = str(change["documentKey"]["_id"])
+                if change["operationType"] == "delete" or change.get("fullDocument") is None:
+                    self.discard(monitor_id)
+                else:
+                    self.apply(change["fullDocument"])
+
+    def _poll(self):
+        self.mode = "polling"
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                for monitor in Monitor.get_updated_since(self.last_updated_at):
+                    self.events += 1
+                    self.apply(monitor)
+                self._maybe_reconcile()
+            except Exception as e:
+                print(f"Monitor registry poll failed: {e}")
+
+    def status(self):
+        return {
+            "mode": self.mode,
+            "monitors": len(self),
+            "events": self.events,
+            "reconciled_changes": self.reconciled_changes
+        }
+
+
+def get_registry():
+    global registry
+    with registry_lock:
+        if registry is None:
+            registry = MonitorRegistry()
+            registry.start()
+    return registry
@@ -0,0 +1,244 @@
+import atexit
+import threading
+import time
+from pymongo.errors import AutoReconnect, BulkWriteError, PyMongoError
+from models import CheckResult, Monitor
+from rollups import write_rollups
+from config import RESULT_BATCH_SIZE, RESULT_FLUSH_SECONDS, RESULT_BUFFER_LIMIT, RESULT_SUBMIT_TIMEOUT, MONITOR_STATE_PERSIST_SECONDS
+
+writer = None
+writer_lock = threading.Lock()
+
+VOLATILE_STATE_FIELDS = ("last_check", "last_response_time", "uptime_percentage")
+
+
+class ResultWriter:
+    def __init__(
+        self,
+        batch_size=RESULT_BATCH_SIZE,
+        flush_interval=RESULT_FLUSH_SECONDS,
+        buffer_limit=RESULT_BUFFER_LIMIT,
+        submit_timeout=RESULT_SUBMIT_TIMEOUT,
+        write_batch=CheckResult.create_many,
+        write_states=Monitor.update_states,
+        state_persist_interval=MONITOR_STATE_PERSIST_SECONDS
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_limit = buffer_limit
+        self.submit_timeout = submit_timeout
+        self.write_batch = write_batch
+        self.write_states = write_states
+        self.state_persist_interval = state_persist_interval
+        self.fence = None
+        self.flush_hooks = []
+        self.buffer = []
+        self.states = {}
+        self.persisted = {}
+        self.condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self.metrics = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "dropped": 0,
+            "fenced": 0,
+            "blocked": 0,
+            "states_submitted": 0,
+            "states_written": 0,
+            "state_batches": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+        self.thread.start()
+
+    def add_flush_hook(self, hook):
+        self.flush_hooks.append(hook)
+
+    def set_fence(self, fence):
+        self.fence = fence
+
+    def submit(self, check, fenced=False):
+        with self.condition:
+            if len(self.buffer) >= self.buffer_limit:
+                self.metrics["blocked"] += 1
+                self.condition.notify_all()
+                deadline = time.monotonic() + self.submit_timeout
+                while len(self.buffer) >= self.buffer_limit and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics["dropped"] += 1
+                        return False
+                    self.condition.wait(remaining)
+            self.buffer.append((check, fenced))
+            self.metrics["submitted"] += 1
+            if len(self.buffer) >= self.batch_size:
+                self.condition.notify_all()
+        return True
+
+    def submit_state(self, monitor_id, state):
+        monitor_id = str(monitor_id)
+        with self.condition:
+            pending = self.states.get(monitor_id)
+            self.states[monitor_id] = {**pending, **state} if pending else dict(state)
+            self.metrics["states_submitted"] += 1
+
+    def _take_states(self, force=False):
+        now = time.monotonic()
+        due = {}
+        with self.condition:
+            for monitor_id, state in list(self.states.items()):
+                persisted = self.persisted.get(monitor_id)
+                if not force and persisted is not None and now - persisted[0] < self.state_persist_interval:
+                    if all(persisted[1].get(k) == v for k, v in state.items() if k not in VOLATILE_STATE_FIELDS):
+                        continue
+                due[monitor_id] = state
+                del self.states[monitor_id]
+        return due
+
+    def _write_states(self, force=False):
+        states = self._take_states(force)
+        if not states:
+            return True
+        try:
+            if self.fence is not None and not self.fence():
+                self.metrics["fenced"] += len(states)
+                return True
+            self.write_states(states)
+        except PyMongoError as e:
+            print(f"Result writer failed to write {len(states)} monitor states: {e}")
+            with self.condition:
+                for monitor_id, state in states.items():
+                    newer = self.states.get(monitor_id)
+                    self.states[monitor_id] = {**state, **newer} if newer else state
+            return False
+        now = time.monotonic()
+        with self.condition:
+            for monitor_id, state in states.items():
+                persisted = self.persisted.get(monitor_id)
+                self.persisted[monitor_id] = (now, {**persisted[1], **state} if persisted else state)
+            self.metrics["states_written"] += len(states)
+            self.metrics["state_batches"] += 1
+        return True
+
+    def forget_state(self, monitor_id):
+        with self.condition:
+            self.states.pop(str(monitor_id), None)
+            self.persisted.pop(str(monitor_id), None)
+
+    def _take_batch(self):
+        with self.condition:
+            entries = self.buffer[:self.batch_size]
+            del self.buffer[:self.batch_size]
+            self.condition.notify_all()
+        return entries
+
+    def _requeue(self, entries):
+        with self.condition:
+            room = max(self.buffer_limit - len(self.buffer), 0)
+            if room < len(entries):
+                self.metrics["dropped"] += len(entries) - room
+            self.buffer[:0] = entries[:room]
+
+    def _write(self, entries):
+        start = time.monotonic()
+        if self.fence is not None and any(fenced for _, fenced in entries) and not self.fence():
+            kept = [entry for entry in entries if not entry[1]]
+            self.metrics["fenced"] += len(entries) - len(kept)
+            entries = kept
+            if not entries:
+                return True
+        batch = [check for check, _ in entries]
+        try:
+            self.write_batch(batch)
+            written = len(batch)
+        except BulkWriteError as e:
+            failed = len(e.details.get("writeErrors", []))
+            written = len(batch) - failed
+            self.metrics["failed"] += failed
+        except AutoReconnect as e:
+            print(f"Result writer lost connection, retrying batch of {len(batch)}: {e}")
+            self._requeue(entries)
+            return False
+        except PyMongoError as e:
+            print(f"Result writer failed to write batch of {len(batch)}: {e}")
+            self.metrics["failed"] += len(batch)
+            return False
+
+        elapsed = (time.monotonic() - start) * 1000
+        self.metrics["written"] += written
+        self.metrics["batches"] += 1
+        self.metrics["last_batch_size"] = len(batch)
+        self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(batch))
+        self.metrics["last_flush_ms"] = round(elapsed, 2)
+        self.metrics["max_flush_ms"] = max(self.metrics["max_flush_ms"], round(elapsed, 2))
+        self.metrics["total_flush_ms"] += elapsed
+
+        for hook in self.flush_hooks:
+            try:
+                hook(batch)
+            except Exception as e:
+                print(f"Result writer flush hook failed: {e}")
+        return True
+
+    def flush(self, force_states=False):
+        with self.flush_lock:
+            while True:
+                entries = self._take_batch()
+                if not entries:
+                    break
+                if not self._write(entries):
+                    return False
+            return self._write_states(force_states)
+
+    def _run(self):
+        healthy = True
+        while True:
+            with self.condition:
+                if not self.stopped and (not healthy or len(self.buffer) < self.batch_size):
+                    self.condition.wait(self.flush_interval)
+                stopped = self.stopped
+            healthy = self.flush()
+            if stopped:
+                return
+
+    def shutdown(self, timeout=10):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        self.flush(force_states=True)
+
+    def status(self):
+        with self.condition:
+            metrics = dict(self.metrics)
+            metrics["buffered"] = len(self.buffer)
+            metrics["states_pending"] = len(self.states)
+        total_flush_ms = metrics.pop("total_flush_ms")
+        metrics["avg_batch_size"] = round(metrics["written"] / metrics["batches"], 1) if metrics["batches"] else 0
+        metrics["avg_flush_ms"] = round(total_flush_ms / metrics["batches"], 2) if metrics["batches"] else 0
+        return metrics
+
+
+def get_result_writer():
+    global writer
+    with writer_lock:
+        if writer is None:
+            writer = ResultWriter()
+            writer.add_flush_hook(write_rollups)
+            atexit.register(shutdown_result_writer)
+    return writer
+
+
+def shutdown_result_writer():
+    global writer
+    with writer_lock:
+        if writer is not None:
+            writer.shutdown()
+            writer = None
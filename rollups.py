@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from models import CheckRollup
+from http_client import PHASES
+
+GRANULARITIES = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400
+}
+
+RETENTION = {
+    "minute": timedelta(days=2),
+    "hour": timedelta(days=90),
+    "day": timedelta(days=730)
+}
+
+LATENCY_BOUNDS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp, granularity):
+    seconds = GRANULARITIES[granularity]
+    elapsed = int((timestamp - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def latency_bucket(response_time):
+    for bound in LATENCY_BOUNDS_MS:
+        if response_time <= bound:
+            return f"le_{bound}"
+    return f"gt_{LATENCY_BOUNDS_MS[-1]}"
+
+
+def new_bucket():
+    return {
+        "up": 0,
+        "down": 0,
+        "rt_count": 0,
+        "rt_sum": 0.0,
+        "rt_min": None,
+        "rt_max": None,
+        "hist": {},
+        "phase_count": 0,
+        "phases": {}
+    }
+
+
+def accumulate(bucket, check):
+    if check.get("status") == "up":
+        bucket["up"] += 1
+    else:
+        bucket["down"] += 1
+
+    response_time = check.get("response_time")
+    if response_time is None:
+        return
+    bucket["rt_count"] += 1
+    bucket["rt_sum"] += response_time
+    bucket["rt_min"] = response_time if bucket["rt_min"] is None else min(bucket["rt_min"], response_time)
+    bucket["rt_max"] = response_time if bucket["rt_max"] is None else max(bucket["rt_max"], response_time)
+    label = latency_bucket(response_time)
+    bucket["hist"][label] = bucket["hist"].get(label, 0) + 1
+
+    timings = (check.get("details") or {}).get("timings")
+    if timings:
+        bucket["phase_count"] += 1
+        for phase in PHASES:
+            bucket["phases"][phase] = bucket["phases"].get(phase, 0.0) + timings.get(phase, 0.0)
+
+
+def aggregate(checks):
+    buckets = {}
+    for check in checks:
+        for granularity in GRANULARITIES:
+            start = bucket_start(check["timestamp"], granularity)
+            key = (check["monitor_id"], granularity, start)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = new_bucket()
+            accumulate(bucket, check)
+    return buckets
+
+
+def build_updates(buckets):
+    updates = []
+    for (monitor_id, granularity, start), bucket in buckets.items():
+        increments = {
+            "up": bucket["up"],
+            "down": bucket["down"],
+            "rt_count": bucket["rt_count"],
+            "rt_sum": bucket["rt_sum"]
+        }
+        for label, count in bucket["hist"].items():
+            increments[f"hist.{label}"] = count
+        if bucket["phase_count"]:
+            increments["phase_count"] = bucket["phase_count"]
+            for phase, total in bucket["phases"].items():
+                increments[f"phase_sum.{phase}"] = total
+
+        update = {
+            "$inc": increments,
+            "$setOnInsert": {"expires_at": start + RETENTION[granularity]}
+        }
+        if bucket["rt_min"] is not None:
+            update["$min"] = {"rt_min": bucket["rt_min"]}
+            update["$max"] = {"rt_max": bucket["rt_max"]}
+
+        updates.append(UpdateOne(
+            {"monitor_id": monitor_id, "granularity": granularity, "bucket": start},
+            update,
+            upsert=True
+        ))
+    return updates
+
+
+def write_rollups(checks):
+    updates = build_updates(aggregate(checks))
+    if updates:
+        CheckRollup.apply(updates)
+    return len(updates)
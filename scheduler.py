@@ -1,94 +1,236 @@
 import threading
 import time
 from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from models import Monitor
-from monitoring import run_check
+from monitoring import probe, record_result, needs_confirmation
+from engine import CheckEngine, ProcessEngine
+from alerts import get_alert_dispatcher, shutdown_alert_dispatcher
+from http_client import get_pool
+from certificates import get_certificate_cache
+from dns_cache import get_dns_cache
+from pinger import get_pinger
+from registry import get_registry
+from result_writer import get_result_writer, shutdown_result_writer
+from uptime import get_uptime_tracker
+from confirmation import get_confirmation_tracker, retry_delay
+from policy import get_interval_policy
+import coalescing
+from sharding import get_membership, shutdown_membership, local_worker_id
+from leader import get_election, shutdown_election
+from timing_wheel import WheelScheduler, next_phase_time
+from config import ENGINE_PROCESSES, SCHEDULER_TICK_SECONDS, WORKER_SHARDING, LEADER_ELECTION
 
 scheduler = None
 scheduler_lock = threading.Lock()
+engine = None
+engine_lock = threading.Lock()
+membership = None
+election = None
+CONFIRM_SUFFIX = "#confirm"
+
+def get_engine():
+    global engine
+    with engine_lock:
+        if engine is None:
+            if ENGINE_PROCESSES:
+                engine = ProcessEngine(probe, record_and_cache, processes=ENGINE_PROCESSES, affinity=coalescing.fingerprint)
+            else:
+                engine = CheckEngine(probe, record_and_cache)
+    return engine
+
+def current_status(monitor_id):
+    monitor = get_registry().get(monitor_id)
+    return monitor.get("status") if monitor is not None else None
+
+def is_active():
+    return election is None or election.is_leader()
+
+def monitor_key(key):
+    return key[:-len(CONFIRM_SUFFIX)] if key.endswith(CONFIRM_SUFFIX) else key
+
+def record_and_cache(monitor, result):
+    if not is_active():
+        return
+    confirming = get_confirmation_tracker().hold(monitor, result)
+    state = record_result(monitor, result, confirming=confirming, scheduled=True)
+    get_registry().update_state(monitor["_id"], state)
+    monitor_id = str(monitor["_id"])
+    if confirming:
+        get_scheduler().schedule(monitor_id + CONFIRM_SUFFIX, None, delay=retry_delay(monitor))
+        return
+    interval = get_interval_policy().observe(monitor, monitor.get("status"), result)
+    sched = scheduler
+    if sched is not None and sched.has(monitor_id) and sched.interval_of(monitor_id) != interval:
+        sched.schedule(monitor_id, interval, phase_key=coalescing.fingerprint(monitor))
+    get_alert_dispatcher(current_status).on_result(monitor, result)
+
+def record_manual(monitor, result):
+    confirming = get_confirmation_tracker().hold(monitor, result) if is_active() else None
+    held = not confirming and needs_confirmation(monitor, result) and not is_active()
+    state = record_result(monitor, result, confirming=confirming, held=held)
+    get_registry().update_state(monitor["_id"], state)
+    if confirming:
+        get_scheduler().schedule(str(monitor["_id"]) + CONFIRM_SUFFIX, None, delay=retry_delay(monitor))
+    return state
+
+def owns(monitor_id):
+    return membership is None or membership.owns(monitor_id)
+
+def first_delay(phase_key, interval):
+    settling = membership.settling_delay() if membership is not None else 0
+    if not settling:
+        return None
+    now = time.time()
+    delay = next_phase_time(phase_key, interval, now) - now
+    while delay < settling:
+        delay += interval
+    return delay
+
+def dispatch_check(key):
+    monitor_id = monitor_key(key)
+    monitor = get_registry().get(monitor_id)
+    if monitor is None or not owns(monitor_id):
+        get_scheduler().remove(key)
+        return
+    if not is_active():
+        return
+    get_engine().submit(monitor)
+
+def on_monitor_changed(monitor_id, monitor):
+    sched = scheduler
+    if sched is None:
+        return
+    if monitor is None or not owns(monitor_id):
+        sched.remove(monitor_id + CONFIRM_SUFFIX)
+        get_confirmation_tracker().forget(monitor_id)
+        get_interval_policy().forget(monitor_id)
+        if monitor is None:
+            get_result_writer().forget_state(monitor_id)
+        if sched.remove(monitor_id) or monitor is None:
+            get_uptime_tracker().forget(monitor_id)
+        return
+    interval = get_interval_policy().interval(monitor)
+    phase_key = coalescing.fingerprint(monitor)
+    if not sched.has(monitor_id):
+        sched.schedule(monitor_id, interval, delay=first_delay(phase_key, interval), phase_key=phase_key)
+    elif sched.interval_of(monitor_id) != interval:
+        sched.schedule(monitor_id, interval, phase_key=phase_key)
+
+def on_rebalance(previous, ring):
+    for monitor in get_registry().all():
+        on_monitor_changed(str(monitor["_id"]), monitor)
+
+def on_leadership(leader):
+    if not leader:
+        return
+    registry = get_registry()
+    registry.load()
+    get_uptime_tracker().clear()
+    get_confirmation_tracker().clear()
+    get_interval_policy().clear()
+    for monitor in registry.all():
+        on_monitor_changed(str(monitor["_id"]), monitor)
 
 def get_scheduler():
-    global scheduler
+    global scheduler, membership, election
     with scheduler_lock:
         if scheduler is None:
-            scheduler = BackgroundScheduler()
+            if WORKER_SHARDING:
+                membership = get_membership()
+                membership.add_listener(on_rebalance)
+                membership.start()
+            elif LEADER_ELECTION:
+                election = get_election("scheduler", local_worker_id())
+                election.add_listener(on_leadership)
+                get_result_writer().set_fence(election.fence)
+                election.start()
+            scheduler = WheelScheduler(dispatch_check, tick=SCHEDULER_TICK_SECONDS)
             scheduler.start()
+            get_registry().add_listener(on_monitor_changed)
     return scheduler
 
+def notify_monitor_changed(monitor_id):
+    if scheduler is None:
+        return
+    get_registry().refresh(str(monitor_id))
+
+def notify_monitor_deleted(monitor_id):
+    if scheduler is None:
+        return
+    get_registry().discard(str(monitor_id))
+
 def schedule_monitor_check(monitor_id, interval_seconds):
-    sched = get_scheduler()
-    job_id = f"monitor_{monitor_id}"
-    
-    existing_job = sched.get_job(job_id)
-    if existing_job:
-        sched.remove_job(job_id)
-    
-    def check_job():
-        try:
-            monitor = Monitor.get_by_id(monitor_id)
-            if monitor and not monitor.get("is_paused", False):
-                run_check(monitor)
-        except Exception as e:
-            print(f"Error checking monitor {monitor_id}: {e}")
-    
-    sched.add_job(
-        check_job,
-        trigger=IntervalTrigger(seconds=interval_seconds),
-        id=job_id,
-        replace_existing=True,
-        max_instances=1
-    )
-    
+    get_scheduler().schedule(str(monitor_id), interval_seconds)
     return True
 
 def remove_monitor_job(monitor_id):
-    sched = get_scheduler()
-    job_id = f"monitor_{monitor_id}"
-    
-    try:
-        sched.remove_job(job_id)
-        return True
-    except:
-        return False
+    return get_scheduler().remove(str(monitor_id))
 
 def sync_all_monitors():
     sched = get_scheduler()
     
-    for job in sched.get_jobs():
-        if job.id.startswith("monitor_"):
-            sched.remove_job(job.id)
-    
-    monitors = Monitor.get_active_monitors()
+    registry = get_registry()
+    registry.reconcile()
+    monitors = registry.all()
+    active_ids = set()
     
     for monitor in monitors:
-        schedule_monitor_check(
-            str(monitor["_id"]),
-            monitor.get("interval", 300)
-        )
+        monitor_id = str(monitor["_id"])
+        active_ids.add(monitor_id)
+        on_monitor_changed(monitor_id, monitor)
+    
+    for key in sched.keys():
+        monitor_id = monitor_key(key)
+        if monitor_id not in active_ids or not owns(monitor_id):
+            sched.remove(key)
     
     return len(monitors)
 
 def get_scheduler_status():
     sched = get_scheduler()
-    jobs = sched.get_jobs()
+    jobs = sched.jobs()
     
     return {
         "running": sched.running,
         "job_count": len(jobs),
+        "dispatched": sched.dispatched,
         "jobs": [
             {
-                "id": job.id,
-                "next_run": job.next_run_time.isoformat() if job.next_run_time else None
+                "id": f"monitor_{monitor_id}",
+                "next_run": datetime.fromtimestamp(next_run).isoformat()
             }
-            for job in jobs
-        ]
+            for monitor_id, next_run in jobs
+        ],
+        "engine": get_engine().status(),
+        "registry": get_registry().status(),
+        "result_writer": get_result_writer().status(),
+        "uptime": get_uptime_tracker().status(),
+        "connection_pool": get_pool().status(),
+        "pinger": get_pinger().status(),
+        "certificates": get_certificate_cache().status(),
+        "dns": get_dns_cache().status(),
+        "alerts": get_alert_dispatcher(current_status).status(),
+        "confirmation": get_confirmation_tracker().status(),
+        "policy": get_interval_policy().status(),
+        "coalescing": coalescing.status(),
+        "sharding": membership.status() if membership is not None else None,
+        "leader": election.status() if election is not None else None
     }
 
 def shutdown_scheduler():
-    global scheduler
+    global scheduler, engine, membership, election
     with scheduler_lock:
         if scheduler:
             scheduler.shutdown(wait=False)
             scheduler = None
+        if membership is not None:
+            shutdown_membership()
+            membership = None
+        if election is not None:
+            shutdown_election()
+            election = None
+    with engine_lock:
+        if engine:
+            engine.shutdown()
+            engine = None
+    shutdown_alert_dispatcher()
+    shutdown_result_writer()
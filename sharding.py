@@ -0,0 +1,145 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+import uuid
+from bisect import bisect
+from models import Worker
+from config import (
+    WORKER_ID,
+    WORKER_HEARTBEAT_SECONDS,
+    WORKER_LEASE_SECONDS,
+    WORKER_HANDOFF_SECONDS,
+    WORKER_RING_REPLICAS
+)
+
+membership = None
+membership_lock = threading.Lock()
+worker_id = None
+
+
+def local_worker_id():
+    global worker_id
+    if worker_id is None:
+        worker_id = WORKER_ID or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    return worker_id
+
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, members, replicas=WORKER_RING_REPLICAS):
+        self.members = tuple(sorted(set(members)))
+        points = sorted(
+            (ring_hash(f"{member}#{replica}"), member)
+            for member in self.members
+            for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.owners = [member for _, member in points]
+
+    def owner(self, key):
+        if not self.owners:
+            return None
+        index = bisect(self.hashes, ring_hash(str(key))) % len(self.hashes)
+        return self.owners[index]
+
+
+class WorkerMembership:
+    def __init__(self, worker_id=None, heartbeat_interval=WORKER_HEARTBEAT_SECONDS, lease=WORKER_LEASE_SECONDS, handoff=WORKER_HANDOFF_SECONDS):
+        self.worker_id = worker_id or local_worker_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.lease = lease
+        self.handoff = max(handoff, heartbeat_interval)
+        self.ring = HashRing([self.worker_id])
+        self.changed_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.heartbeats = 0
+        self.rebalances = 0
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def owns(self, key):
+        with self.lock:
+            return self.ring.owner(key) == self.worker_id
+
+    def settling_delay(self):
+        with self.lock:
+            return max(0.0, self.handoff - (time.monotonic() - self.changed_at))
+
+    def heartbeat(self):
+        Worker.heartbeat(self.worker_id, self.lease)
+        self.heartbeats += 1
+        ring = HashRing(Worker.get_live() + [self.worker_id])
+        with self.lock:
+            previous = self.ring
+            if ring.members == previous.members:
+                return False
+            self.ring = ring
+            self.changed_at = time.monotonic()
+        self.rebalances += 1
+        print(f"Worker {self.worker_id} rebalanced: {len(ring.members)} live workers")
+        for listener in self.listeners:
+            try:
+                listener(previous, ring)
+            except Exception as e:
+                print(f"Rebalance listener failed: {e}")
+        return True
+
+    def start(self):
+        if self.thread is not None:
+            return
+        try:
+            self.heartbeat()
+        except Exception as e:
+            print(f"Initial worker heartbeat failed: {e}")
+        self.thread = threading.Thread(target=self._run, name="worker-membership", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"Worker heartbeat failed: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        try:
+            Worker.remove(self.worker_id)
+        except Exception as e:
+            print(f"Failed to release worker lease: {e}")
+
+    def status(self):
+        with self.lock:
+            members = list(self.ring.members)
+        return {
+            "worker_id": self.worker_id,
+            "workers": members,
+            "heartbeats": self.heartbeats,
+            "rebalances": self.rebalances,
+            "settling": round(self.settling_delay(), 1)
+        }
+
+
+def get_membership():
+    global membership
+    with membership_lock:
+        if membership is None:
+            membership = WorkerMembership()
+    return membership
+
+
+def shutdown_membership():
+    global membership
+    with membership_lock:
+        if membership is not None:
+            membership.stop()
+            membership = None
@@ -0,0 +1,29 @@
+from pymongo.errors import ConnectionFailure
+
+import database
+
+
+def test_failed_connection_is_not_cached(monkeypatch):
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionFailure("server down")
+        return "db"
+
+    monkeypatch.setattr(database, "MONGODB_URI", "mongodb://example")
+    monkeypatch.setattr(database, "connect_database", connect)
+    monkeypatch.setattr(database, "_database", None)
+
+    assert database.get_database() is None
+    assert database.get_database() == "db"
+    assert database.get_database() == "db"
+    assert len(attempts) == 2
+
+
+def test_missing_uri_returns_none(monkeypatch):
+    monkeypatch.setattr(database, "MONGODB_URI", "")
+    monkeypatch.setattr(database, "_database", None)
+
+    assert database.get_database() is None
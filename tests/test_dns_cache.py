@@ -0,0 +1,59 @@
+import asyncio
+import socket
+
+import pytest
+
+from dns_cache import DNSCache, HostsFile
+
+
+class FailingResolver:
+    async def resolve(self, *args, **kwargs):
+        raise AssertionError("the DNS resolver should not be queried")
+
+
+@pytest.fixture
+def hosts(tmp_path):
+    path = tmp_path / "hosts"
+    path.write_text(
+        "# comment\n"
+        "127.0.0.1 localhost\n"
+        "10.1.2.3 db.internal db  # inline comment\n"
+        "fd00::3 db.internal\n"
+    )
+    return HostsFile(str(path))
+
+
+def test_hosts_file_entries_win_over_dns(hosts):
+    cache = DNSCache(resolver=FailingResolver(), hosts=hosts)
+
+    addresses = asyncio.run(cache.resolve("DB.internal."))
+
+    assert addresses == [(socket.AF_INET, "10.1.2.3"), (socket.AF_INET6, "fd00::3")]
+    assert cache.status()["hosts_file"] == 1
+
+
+def test_hosts_file_is_reloaded_when_it_changes(hosts):
+    assert hosts.lookup("db") == [(socket.AF_INET, "10.1.2.3")]
+
+    with open(hosts.path, "w") as f:
+        f.write("10.9.9.9 db\n")
+    hosts.mtime = None
+
+    assert hosts.lookup("db") == [(socket.AF_INET, "10.9.9.9")]
+
+
+def test_single_label_names_use_the_system_resolver(hosts, monkeypatch):
+    cache = DNSCache(resolver=FailingResolver(), hosts=hosts)
+
+    async def getaddrinfo(host, port, type=0):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.4.4.4", 0))]
+
+    async def run():
+        monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+        return await cache.resolve("cache")
+
+    assert asyncio.run(run()) == [(socket.AF_INET, "10.4.4.4")]
+
+
+def test_missing_hosts_file_is_ignored(tmp_path):
+    assert HostsFile(str(tmp_path / "missing")).lookup("localhost") is None
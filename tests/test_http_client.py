@@ -0,0 +1,116 @@
+import asyncio
+import http.server
+import socketserver
+import threading
+
+import pytest
+
+import http_client
+from http_client import build_request, fetch, rebuild_method, split_url
+
+
+class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/login":
+            if "session=abc" in (self.headers.get("Cookie") or ""):
+                return self.reply(200, b"welcome")
+            return self.reply(302, headers={"Set-Cookie": "session=abc; Path=/", "Location": "/login"})
+        if self.path.startswith("/redirect/"):
+            return self.reply(int(self.path.rsplit("/", 1)[1]), headers={"Location": "/method"})
+        self.reply(200, f"GET {self.path}".encode("utf-8"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.startswith("/redirect/"):
+            return self.reply(int(self.path.rsplit("/", 1)[1]), headers={"Location": "/method"})
+        self.reply(200, b"POST " + body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = Server(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_cookies_persist_across_redirects(base_url):
+    response = run(fetch("GET", f"{base_url}/login"))
+    assert response.status_code == 200
+    assert response.content == b"welcome"
+
+
+def test_request_target_is_percent_encoded(base_url):
+    response = run(fetch("GET", f"{base_url}/café x?q=a b"))
+    assert response.status_code == 200
+    assert response.content == b"GET /caf%C3%A9%20x?q=a%20b"
+
+
+def test_encoded_target_is_not_double_encoded():
+    assert split_url("http://example.com/a%20b?x=%2F")[3] == "/a%20b?x=%2F"
+
+
+def test_non_ascii_host_is_idna_encoded(monkeypatch):
+    scheme, host, port, target = split_url("http://bücher.example/")
+    assert host == "xn--bcher-kva.example"
+    request = build_request("GET", host, port, scheme, target, None, None)
+    assert b"Host: xn--bcher-kva.example\r\n" in request
+
+    resolved = []
+
+    async def resolve(name):
+        resolved.append(name)
+        raise OSError("no network in tests")
+
+    monkeypatch.setattr(http_client.dns_cache, "resolve", resolve)
+    with pytest.raises(OSError):
+        run(fetch("GET", "http://bücher.example/"))
+    assert resolved == ["xn--bcher-kva.example"]
+
+
+@pytest.mark.parametrize("status, method, expected", [
+    (301, "POST", "GET"),
+    (301, "PUT", "PUT"),
+    (302, "POST", "GET"),
+    (302, "PUT", "GET"),
+    (302, "HEAD", "HEAD"),
+    (303, "PUT", "GET"),
+    (303, "HEAD", "HEAD"),
+    (307, "POST", "POST"),
+    (308, "POST", "POST"),
+])
+def test_rebuild_method(status, method, expected):
+    assert rebuild_method(status, method) == expected
+
+
+@pytest.mark.parametrize("status, expected", [
+    (302, b"GET /method"),
+    (303, b"GET /method"),
+    (307, b"POST payload"),
+])
+def test_redirected_post(base_url, status, expected):
+    response = run(fetch("POST", f"{base_url}/redirect/{status}", body="payload"))
+    assert response.content == expected
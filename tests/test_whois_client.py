@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from whois_client import WhoisError, lookup, registrable_domain
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("example.com", "example.com"),
+    ("a.b.example.com", "example.com"),
+    ("www.example.co.uk", "example.co.uk"),
+    ("shop.example.com.au", "example.com.au"),
+    ("www.info.de", "info.de"),
+    ("www.gov.uk", "gov.uk"),
+    ("hmrc.gov.uk", "hmrc.gov.uk"),
+    ("Example.COM.", "example.com"),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected
+
+
+@pytest.mark.parametrize("host", ["1.2.3.10", "2001:db8::1", "[2001:db8::1]"])
+def test_registrable_domain_keeps_ip_literals(host):
+    assert registrable_domain(host) == host
+
+
+def test_lookup_rejects_ip_literals():
+    with pytest.raises(WhoisError):
+        asyncio.run(lookup("192.0.2.10"))
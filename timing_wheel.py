@@ -0,0 +1,180 @@
+import hashlib
+import math
+import threading
+import time
+
+
+def phase_offset(key, interval):
+    digest = hashlib.sha1(str(key).encode("utf-8")).digest()
+    return (int.from_bytes(digest[:8], "big") % int(interval * 1000)) / 1000.0
+
+
+def next_phase_time(key, interval, now):
+    offset = phase_offset(key, interval)
+    deadline = now - (now % interval) + offset
+    if deadline <= now:
+        deadline += interval
+    return deadline
+
+
+class TimerEntry:
+    __slots__ = ("key", "deadline", "interval", "cancelled")
+
+    def __init__(self, key, deadline, interval):
+        self.key = key
+        self.deadline = deadline
+        self.interval = interval
+        self.cancelled = False
+
+
+class TimingWheel:
+    def __init__(self, tick=0.1, slots=64, levels=4, now=0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current_tick = int(now / tick)
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.size = 0
+
+    def add(self, key, deadline, interval=None):
+        entry = TimerEntry(key, deadline, interval)
+        self._place(entry)
+        self.size += 1
+        return entry
+
+    def cancel(self, entry):
+        if not entry.cancelled:
+            entry.cancelled = True
+            self.size -= 1
+
+    def _expiry_tick(self, entry):
+        return math.ceil(entry.deadline / self.tick)
+
+    def requeue(self, entry):
+        self._place(entry)
+
+    def _place(self, entry):
+        expiry_tick = max(self._expiry_tick(entry), self.current_tick + 1)
+        for level in range(self.levels):
+            span = self.slots ** level
+            if (expiry_tick // span) - (self.current_tick // span) < self.slots:
+                self.wheels[level][(expiry_tick // span) % self.slots].append(entry)
+                return
+        span = self.slots ** (self.levels - 1)
+        index = ((self.current_tick // span) + self.slots - 1) % self.slots
+        self.wheels[self.levels - 1][index].append(entry)
+
+    def _cascade(self):
+        for level in range(self.levels - 1, 0, -1):
+            span = self.slots ** level
+            if self.current_tick % span:
+                continue
+            index = (self.current_tick // span) % self.slots
+            bucket = self.wheels[level][index]
+            self.wheels[level][index] = []
+            for entry in bucket:
+                if not entry.cancelled:
+                    self._place(entry)
+
+    def advance(self, now):
+        expired = []
+        target_tick = int(now / self.tick)
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            self._cascade()
+            index = self.current_tick % self.slots
+            bucket = self.wheels[0][index]
+            self.wheels[0][index] = []
+            for entry in bucket:
+                if entry.cancelled:
+                    continue
+                if self._expiry_tick(entry) > self.current_tick:
+                    self._place(entry)
+                    continue
+                expired.append(entry)
+        return expired
+
+
+class WheelScheduler:
+    def __init__(self, dispatch, tick=0.1, slots=64, levels=4):
+        self.dispatch = dispatch
+        self.wheel = TimingWheel(tick=tick, slots=slots, levels=levels, now=time.monotonic())
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.running = False
+        self.dispatched = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="wheel-scheduler", daemon=True)
+        self.thread.start()
+
+    def shutdown(self, wait=False):
+        self.running = False
+        self.stop_event.set()
+        if wait and self.thread:
+            self.thread.join(timeout=5)
+
+    def schedule(self, key, interval, delay=None, phase_key=None):
+        now_wall = time.time()
+        if delay is None:
+            delay = next_phase_time(phase_key or key, interval, now_wall) - now_wall
+        with self.lock:
+            existing = self.entries.pop(key, None)
+            if existing:
+                self.wheel.cancel(existing)
+            self.entries[key] = self.wheel.add(key, time.monotonic() + delay, interval)
+
+    def remove(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry:
+                self.wheel.cancel(entry)
+                return True
+        return False
+
+    def has(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def interval_of(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry.interval if entry else None
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries)
+
+    def jobs(self):
+        offset = time.time() - time.monotonic()
+        with self.lock:
+            return [(key, entry.deadline + offset) for key, entry in self.entries.items()]
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            with self.lock:
+                expired = self.wheel.advance(now)
+                for entry in expired:
+                    if entry.interval:
+                        entry.deadline += entry.interval
+                        if entry.deadline <= now:
+                            entry.deadline += ((now - entry.deadline) // entry.interval + 1) * entry.interval
+                        self.wheel.requeue(entry)
+                    else:
+                        self.wheel.cancel(entry)
+                        if self.entries.get(entry.key) is entry:
+                            del self.entries[entry.key]
+            for entry in expired:
+                try:
+                    self.dispatch(entry.key)
+                    self.dispatched += 1
+                except Exception as e:
+                    print(f"Error dispatching {entry.key}: {e}")
+            self.stop_event.wait(self.wheel.tick - (time.monotonic() % self.wheel.tick))
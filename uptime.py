@@ -0,0 +1,114 @@
+import threading
+import time
+from array import array
+from models import CheckResult
+from config import UPTIME_WINDOW_HOURS, UPTIME_BUCKET_SECONDS
+
+tracker = None
+tracker_lock = threading.Lock()
+
+
+class UptimeWindow:
+    __slots__ = ("up", "total", "stamps", "up_sum", "total_sum", "last_index")
+
+    def __init__(self, size):
+        self.up = array("I", [0]) * size
+        self.total = array("I", [0]) * size
+        self.stamps = array("q", [-1]) * size
+        self.up_sum = 0
+        self.total_sum = 0
+        self.last_index = None
+
+    def _reset(self, slot, index):
+        self.up_sum -= self.up[slot]
+        self.total_sum -= self.total[slot]
+        self.up[slot] = 0
+        self.total[slot] = 0
+        self.stamps[slot] = index
+
+    def advance(self, index):
+        size = len(self.stamps)
+        if self.last_index is None:
+            self.last_index = index
+        if index <= self.last_index:
+            return
+        start = max(self.last_index + 1, index - size + 1)
+        for i in range(start, index + 1):
+            slot = i % size
+            if self.stamps[slot] != i:
+                self._reset(slot, i)
+        self.last_index = index
+
+    def add(self, index, up, total):
+        size = len(self.stamps)
+        if self.last_index is not None and index <= self.last_index - size:
+            return
+        self.advance(index)
+        slot = index % size
+        if self.stamps[slot] != index:
+            self._reset(slot, index)
+        self.up[slot] += up
+        self.total[slot] += total
+        self.up_sum += up
+        self.total_sum += total
+
+    def percentage(self):
+        if not self.total_sum:
+            return 100.0
+        return round((self.up_sum / self.total_sum) * 100, 2)
+
+
+class UptimeTracker:
+    def __init__(self, window_hours=UPTIME_WINDOW_HOURS, bucket_seconds=UPTIME_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.size = int(window_hours * 3600 // bucket_seconds)
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.seeded = 0
+
+    def _load(self, monitor_id):
+        window = UptimeWindow(self.size)
+        since = time.time() - self.size * self.bucket_seconds
+        for bucket_start, up, total in CheckResult.count_by_bucket(monitor_id, since, self.bucket_seconds):
+            window.add(int(bucket_start // self.bucket_seconds), up, total)
+        return window
+
+    def _window(self, monitor_id):
+        with self.lock:
+            window = self.windows.get(monitor_id)
+        if window is not None:
+            return window
+        loaded = self._load(monitor_id)
+        with self.lock:
+            if monitor_id not in self.windows:
+                self.windows[monitor_id] = loaded
+                self.seeded += 1
+            return self.windows[monitor_id]
+
+    def record(self, monitor_id, status, timestamp=None):
+        monitor_id = str(monitor_id)
+        index = int((timestamp or time.time()) // self.bucket_seconds)
+        window = self._window(monitor_id)
+        with self.lock:
+            window.add(index, 1 if status == "up" else 0, 1)
+            return window.percentage()
+
+    def forget(self, monitor_id):
+        with self.lock:
+            self.windows.pop(str(monitor_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+    def status(self):
+        with self.lock:
+            return {"monitors": len(self.windows), "seeded": self.seeded}
+
+
+def get_uptime_tracker():
+    global tracker
+    with tracker_lock:
+        if tracker is None:
+            tracker = UptimeTracker()
+    return tracker
@@ -0,0 +1,187 @@
+import asyncio
+import ipaddress
+import re
+from datetime import datetime, timedelta, timezone
+from dateutil import parser as date_parser
+from config import WHOIS_TIMEOUT, WHOIS_MAX_REFERRALS, WHOIS_MAX_RESPONSE_BYTES
+import dns_cache
+
+IANA_SERVER = "whois.iana.org"
+
+WHOIS_SERVERS = {
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.pir.org",
+    "info": "whois.nic.info",
+    "biz": "whois.nic.biz",
+    "io": "whois.nic.io",
+    "co": "whois.nic.co",
+    "me": "whois.nic.me",
+    "ai": "whois.nic.ai",
+    "app": "whois.nic.google",
+    "dev": "whois.nic.google",
+    "xyz": "whois.nic.xyz",
+    "online": "whois.nic.online",
+    "site": "whois.nic.site",
+    "uk": "whois.nic.uk",
+    "de": "whois.denic.de",
+    "fr": "whois.nic.fr",
+    "nl": "whois.domain-registry.nl",
+    "eu": "whois.eu",
+    "ca": "whois.cira.ca",
+    "au": "whois.auda.org.au",
+    "us": "whois.nic.us",
+    "in": "whois.registry.in",
+    "jp": "whois.jprs.jp",
+    "ru": "whois.tcinet.ru",
+    "br": "whois.registro.br",
+    "ch": "whois.nic.ch",
+    "se": "whois.iis.se",
+    "pl": "whois.dns.pl",
+    "it": "whois.nic.it"
+}
+
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "me.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "net.uk", "sch.uk", "nhs.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au", "asn.au", "id.au",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "com.br", "net.br", "org.br", "gov.br", "edu.br",
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in", "ac.in", "gov.in",
+    "co.nz", "org.nz", "net.nz", "ac.nz", "govt.nz",
+    "co.za", "org.za", "ac.za", "gov.za",
+    "com.cn", "net.cn", "org.cn", "gov.cn", "edu.cn",
+    "co.kr", "or.kr", "ac.kr", "go.kr",
+    "co.il", "org.il", "ac.il",
+    "co.id", "or.id", "ac.id", "go.id",
+    "co.th", "ac.th", "go.th",
+    "com.ar", "gob.ar", "com.co", "com.pe", "com.ve",
+    "com.mx", "gob.mx", "com.tr", "gov.tr", "com.sg", "com.hk", "com.tw", "com.my", "com.ph",
+    "com.vn", "com.pk", "com.ng", "com.eg", "com.sa", "com.ua", "com.pl", "co.at", "or.at", "co.ke"
+}
+
+EXPIRY_PATTERN = re.compile(
+    r"^\s*(?:registry expiry date|registrar registration expiration date|expiration date|expiry date"
+    r"|expire date|expires on|expires|expiration time|paid-till|renewal date)\s*[:.]+\s*(\S.*?)\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+REFERRAL_PATTERN = re.compile(
+    r"^\s*(?:refer|whois|registrar whois server|referralserver)\s*:\s*(?:r?whois://)?(\S+?)/?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+_inflight = {}
+
+
+class WhoisError(Exception):
+    pass
+
+
+def is_ip_address(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+def registrable_domain(host):
+    host = host.strip(".").lower()
+    if is_ip_address(host):
+        return host
+    labels = host.split(".")
+    if labels[0] == "www" and len(labels) > 2:
+        labels = labels[1:]
+    if len(labels) <= 2:
+        return ".".join(labels)
+    if ".".join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def split_server(server):
+    host, _, port = server.partition(":")
+    return host, int(port) if port.isdigit() else 43
+
+
+def parse_expiry(text):
+    for match in EXPIRY_PATTERN.finditer(text):
+        try:
+            expiry_date = date_parser.parse(match.group(1), fuzzy=True)
+        except (ValueError, OverflowError):
+            continue
+        if expiry_date.tzinfo is not None:
+            expiry_date = expiry_date.astimezone(timezone.utc).replace(tzinfo=None)
+        return expiry_date
+    return None
+
+
+def find_referral(text, current):
+    for match in REFERRAL_PATTERN.finditer(text):
+        server = match.group(1).lower()
+        if server != current.lower() and "." in server:
+            return server
+    return None
+
+
+async def query(server, domain, timeout=WHOIS_TIMEOUT):
+    host, port = split_server(server)
+    reader, writer = await asyncio.wait_for(dns_cache.open_connection(host, port), timeout)
+    try:
+        writer.write(f"{domain}\r\n".encode("idna"))
+        await writer.drain()
+        chunks = []
+        size = 0
+        while size < WHOIS_MAX_RESPONSE_BYTES:
+            chunk = await asyncio.wait_for(reader.read(65536), timeout)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks).decode("utf-8", errors="replace")
+    finally:
+        writer.close()
+
+
+async def _lookup(domain, server, timeout, max_referrals):
+    server = server or WHOIS_SERVERS.get(domain.rsplit(".", 1)[-1], IANA_SERVER)
+    chain = []
+    expiry_date = None
+    while server and len(chain) <= max_referrals:
+        try:
+            text = await query(server, domain, timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            if not chain:
+                raise WhoisError(f"WHOIS query to {server} failed: {e or 'timeout'}")
+            break
+        chain.append(server)
+        expiry_date = parse_expiry(text) or expiry_date
+        server = find_referral(text, server)
+        if server in chain:
+            break
+
+    return {
+        "domain": domain,
+        "expiry_date": expiry_date,
+        "server": chain[-1],
+        "chain": chain
+    }
+
+
+async def lookup(domain, server=None, timeout=WHOIS_TIMEOUT, max_referrals=WHOIS_MAX_REFERRALS):
+    domain = registrable_domain(domain)
+    if is_ip_address(domain):
+        raise WhoisError(f"{domain} is an IP address, not a domain name")
+    task = _inflight.get(domain)
+    if task is None:
+        task = asyncio.ensure_future(_lookup(domain, server, timeout, max_referrals))
+        _inflight[domain] = task
+        task.add_done_callback(lambda _: _inflight.pop(domain, None))
+    return await asyncio.shield(task)
+
+
+def cache_ttl(expiry_date, min_ttl, max_ttl, unparsed_ttl):
+    if expiry_date is None:
+        return timedelta(seconds=unparsed_ttl)
+    remaining = (expiry_date - datetime.utcnow()).total_seconds()
+    return timedelta(seconds=min(max(remaining / 4, min_ttl), max_ttl))
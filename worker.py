@@ -0,0 +1,57 @@
+import signal
+import sys
+import threading
+from database import open_database
+from scheduler import sync_all_monitors, get_scheduler_status, shutdown_scheduler
+from sharding import local_worker_id
+from models import Worker
+from config import WORKER_STATUS_SECONDS
+
+stop_event = threading.Event()
+
+
+def publish_status(worker_id):
+    try:
+        status = get_scheduler_status()
+        status.pop("jobs", None)
+        Worker.publish_status(worker_id, status)
+    except Exception as e:
+        print(f"Failed to publish worker status: {e}")
+        return None
+    return status
+
+
+def handle_signal(signum, frame):
+    stop_event.set()
+
+
+def main():
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    worker_id = local_worker_id()
+    try:
+        open_database()
+    except Exception as e:
+        print(f"Worker {worker_id} cannot reach MongoDB: {e}")
+        sys.exit(1)
+    
+    count = sync_all_monitors()
+    print(f"Worker {worker_id} started with {count} monitors")
+    
+    try:
+        while True:
+            publish_status(worker_id)
+            if stop_event.wait(WORKER_STATUS_SECONDS):
+                break
+    finally:
+        print(f"Worker {worker_id} shutting down")
+        shutdown_scheduler()
+        try:
+            Worker.remove(worker_id)
+        except Exception as e:
+            print(f"Failed to remove worker status: {e}")
+
+
+if __name__ == "__main__":
+    main()